@@ -1,6 +1,7 @@
 """
 Multi-agent workflow API routes.
 """
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from db.database import get_db
@@ -124,12 +125,16 @@ async def run_all_agents(
         "proposal": True
     }
     print(f"Selected tasks: {selected_tasks}")
-    result = workflow_manager.run_workflow(
+    # The graph already fans independent agents out in parallel; running it
+    # in a worker thread keeps this event loop free for other requests
+    result = await asyncio.to_thread(
+        workflow_manager.run_workflow,
         project_id=request.project_id,
         rfp_document_id=request.rfp_document_id,
         db=db,
         selected_tasks=selected_tasks,
-        user_id=current_user.id
+        user_id=current_user.id,
+        event_loop=asyncio.get_running_loop()
     )
     
     if not result.get("success"):
@@ -72,7 +72,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         # Send verification email
         try:
             await send_verification_email(user_data.email, verification_token)
-            print(f"[REGISTRATION] Verification email sent successfully to: {user_data.email}", file=sys.stderr, flush=True)
+            print(f"[REGISTRATION] Verification email queued for: {user_data.email}", file=sys.stderr, flush=True)
         except Exception as e:
             # Error already logged in email_service with full details
             print(f"[REGISTRATION WARNING] User registered but verification email failed. User ID: {new_user.id}, Email: {user_data.email}", file=sys.stderr, flush=True)
@@ -437,7 +437,7 @@ async def forgot_password(
     try:
         from utils.email_service import send_password_reset_email
         await send_password_reset_email(user.email, reset_token)
-        print(f"[PASSWORD RESET] Password reset email sent successfully to: {user.email}", file=sys.stderr, flush=True)
+        print(f"[PASSWORD RESET] Password reset email queued for: {user.email}", file=sys.stderr, flush=True)
     except Exception as e:
         # Error already logged in email_service with full details
         print(f"[PASSWORD RESET WARNING] Password reset token created but email failed. Email: {user.email}", file=sys.stderr, flush=True)
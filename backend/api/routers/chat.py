@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import and_, or_, func
 from typing import List, Dict, Set, Optional
 from datetime import datetime
@@ -445,41 +445,58 @@ async def get_conversations(
     ).offset(skip).limit(limit).all()
     
     conversation_ids = [p.conversation_id for p in participants]
-    conversations = db.query(Conversation).filter(
+    if not conversation_ids:
+        return {"conversations": [], "total": 0}
+    
+    # Participants and their users are loaded in bulk, not per conversation
+    conversations = db.query(Conversation).options(
+        selectinload(Conversation.participants).joinedload(ConversationParticipant.user)
+    ).filter(
         Conversation.id.in_(conversation_ids)
     ).order_by(Conversation.updated_at.desc()).all()
     
+    # Last message per conversation in one query
+    ranked = db.query(
+        Message.id.label("id"),
+        func.row_number().over(
+            partition_by=Message.conversation_id,
+            order_by=Message.created_at.desc()
+        ).label("rank")
+    ).filter(Message.conversation_id.in_(conversation_ids)).subquery()
+    last_messages = {
+        m.conversation_id: m
+        for m in db.query(Message).options(joinedload(Message.sender)).join(
+            ranked, Message.id == ranked.c.id
+        ).filter(ranked.c.rank == 1).all()
+    }
+    
+    # Unread counts for all conversations in one grouped query
+    unread_counts = dict(
+        db.query(Message.conversation_id, func.count(Message.id)).join(
+            ConversationParticipant,
+            and_(
+                ConversationParticipant.conversation_id == Message.conversation_id,
+                ConversationParticipant.user_id == current_user.id
+            )
+        ).filter(
+            and_(
+                Message.conversation_id.in_(conversation_ids),
+                Message.sender_id != current_user.id,
+                Message.is_read == False,
+                or_(
+                    ConversationParticipant.last_read_at == None,
+                    Message.created_at > ConversationParticipant.last_read_at
+                )
+            )
+        ).group_by(Message.conversation_id).all()
+    )
+    
     result = []
     for conv in conversations:
-        # Get participants
-        conv_participants = db.query(ConversationParticipant).filter(
-            ConversationParticipant.conversation_id == conv.id
-        ).all()
-        
-        # Get last message
-        last_message = db.query(Message).filter(
-            Message.conversation_id == conv.id
-        ).order_by(Message.created_at.desc()).first()
-        
-        # Get unread count
-        user_participant = next((p for p in conv_participants if p.user_id == current_user.id), None)
-        unread_count = 0
-        if user_participant:
-            unread_count = db.query(Message).filter(
-                and_(
-                    Message.conversation_id == conv.id,
-                    Message.sender_id != current_user.id,
-                    Message.is_read == False,
-                    or_(
-                        user_participant.last_read_at == None,
-                        Message.created_at > user_participant.last_read_at
-                    )
-                )
-            ).count()
-        
+        last_message = last_messages.get(conv.id)
         last_msg_response = None
         if last_message:
-            sender = db.query(User).filter(User.id == last_message.sender_id).first()
+            sender = last_message.sender
             last_msg_response = {
                 "id": last_message.id,
                 "conversation_id": last_message.conversation_id,
@@ -501,13 +518,13 @@ async def get_conversations(
             "participants": [
                 {
                     "id": p.user_id,
-                    "name": db.query(User).filter(User.id == p.user_id).first().full_name,
-                    "email": db.query(User).filter(User.id == p.user_id).first().email
+                    "name": p.user.full_name,
+                    "email": p.user.email
                 }
-                for p in conv_participants
+                for p in conv.participants
             ],
             "last_message": last_msg_response,
-            "unread_count": unread_count
+            "unread_count": unread_counts.get(conv.id, 0)
         })
     
     return {"conversations": result, "total": len(result)}
@@ -536,27 +553,15 @@ async def get_messages(
             detail="Not a participant in this conversation"
         )
     
-    # Get messages
-    messages = db.query(Message).filter(
+    # Get messages with their senders in a single query
+    messages = db.query(Message).options(joinedload(Message.sender)).filter(
         Message.conversation_id == conversation_id
     ).order_by(Message.created_at.desc()).offset(skip).limit(limit).all()
     
-    # Mark as read
-    from utils.timezone import now_utc_from_ist
-    participant.last_read_at = now_utc_from_ist()
-    db.query(Message).filter(
-        and_(
-            Message.conversation_id == conversation_id,
-            Message.sender_id != current_user.id,
-            Message.is_read == False
-        )
-    ).update({"is_read": True})
-    db.commit()
-    
-    # Format response
+    # Format response before commit expires the loaded rows
     result = []
     for msg in reversed(messages):  # Reverse to get chronological order
-        sender = db.query(User).filter(User.id == msg.sender_id).first()
+        sender = msg.sender
         result.append({
             "id": msg.id,
             "conversation_id": msg.conversation_id,
@@ -564,11 +569,24 @@ async def get_messages(
             "sender_name": sender.full_name if sender else "Unknown",
             "sender_email": sender.email if sender else "",
             "content": msg.content,
-            "is_read": msg.is_read,
+            # Messages from others are marked read below
+            "is_read": msg.is_read or msg.sender_id != current_user.id,
             "created_at": msg.created_at,
             "updated_at": msg.updated_at
         })
     
+    # Mark as read
+    from utils.timezone import now_utc_from_ist
+    participant.last_read_at = now_utc_from_ist()
+    db.query(Message).filter(
+        and_(
+            Message.conversation_id == conversation_id,
+            Message.sender_id != current_user.id,
+            Message.is_read == False
+        )
+    ).update({"is_read": True})
+    db.commit()
+    
     return result
 
 
@@ -873,7 +873,7 @@ async def submit_proposal(
         ADMIN_ROLE = "pre_sales_manager"
         
         # Import email service
-        from utils.email_service import send_proposal_submission_email
+        from utils.email_service import send_proposal_submission_email_bulk
         
         # Get all active admins with verified emails
         admins = db.query(User).filter(
@@ -901,13 +901,13 @@ async def submit_proposal(
                 metadata_={"proposal_id": proposal.id, "project_id": project.id, "submitter_id": current_user.id}
             )
             db.add(notification)
-            
-            # Send email notification with all proposal data (non-blocking)
-            import sys
+        
+        # Send one email per admin with all proposal data (non-blocking)
+        import sys
+        if admins:
             try:
-                await send_proposal_submission_email(
-                    manager_email=admin.email,
-                    manager_name=admin.full_name,
+                await send_proposal_submission_email_bulk(
+                    [(admin.email, admin.full_name) for admin in admins],
                     proposal_title=proposal.title,
                     submitter_name=current_user.full_name,
                     submitter_message=request.message,
@@ -923,7 +923,7 @@ async def submit_proposal(
                 )
             except Exception as e:
                 # Error already logged in email_service with full details
-                print(f"[PROPOSAL SUBMISSION WARNING] Email notification failed for admin: {admin.email}, Proposal ID: {proposal.id}", file=sys.stderr, flush=True)
+                print(f"[PROPOSAL SUBMISSION WARNING] Email notifications failed for admins, Proposal ID: {proposal.id}", file=sys.stderr, flush=True)
         
         # If a specific manager_id was provided, also send notification to that manager
         # (in addition to all admins, if not already included)
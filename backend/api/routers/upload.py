@@ -2,14 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
 import os
 import uuid
+import aiofiles
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 from db.database import get_db
 from models.user import User
 from models.project import Project
 from models.rfp_document import RFPDocument  # Fixed: import from correct module
 from utils.dependencies import get_current_user
-from utils.config import settings
+from utils.config import Settings, get_settings, settings
 
 router = APIRouter()
 
@@ -21,10 +23,32 @@ def get_file_extension(filename: str) -> str:
     """Get file extension."""
     return Path(filename).suffix.lower()
 
-def is_allowed_file(filename: str) -> bool:
+def is_allowed_file(filename: str, app_settings: Settings = settings) -> bool:
     """Check if file extension is allowed."""
     ext = get_file_extension(filename)
-    return ext in settings.allowed_extensions_list
+    return ext in app_settings.allowed_extensions_set
+
+# Uploads are copied to disk in chunks of this size instead of read whole
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+async def save_upload(file: UploadFile, destination: Path, max_size: int) -> Optional[int]:
+    """Stream an upload to disk and return its size.
+    
+    Returns None (and removes the partial file) once more than max_size
+    bytes have been received, so memory stays bounded by one chunk.
+    """
+    file_size = 0
+    async with aiofiles.open(destination, "wb") as out:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            file_size += len(chunk)
+            if file_size > max_size:
+                break
+            await out.write(chunk)
+    
+    if file_size > max_size:
+        destination.unlink(missing_ok=True)
+        return None
+    return file_size
 
 @router.post("/rfp")
 async def upload_rfp(
@@ -33,7 +57,8 @@ async def upload_rfp(
     auto_index: bool = True,  # Auto-build index by default
     auto_analyze: bool = False,  # Auto-run workflow (optional, for quick proposal)
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    app_settings: Settings = Depends(get_settings)
 ):
     """Upload an RFP document for a project.
     
@@ -56,21 +81,10 @@ async def upload_rfp(
         )
     
     # Validate file
-    if not is_allowed_file(file.filename):
+    if not is_allowed_file(file.filename, app_settings):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type not allowed. Allowed types: {', '.join(settings.allowed_extensions_list)}"
-        )
-    
-    # Read file content
-    file_content = await file.read()
-    file_size = len(file_content)
-    
-    # Check file size
-    if file_size > settings.MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE / (1024*1024)}MB"
+            detail=f"File type not allowed. Allowed types: {', '.join(app_settings.allowed_extensions_list)}"
         )
     
     # Generate unique filename
@@ -81,10 +95,14 @@ async def upload_rfp(
     project_dir = UPLOAD_DIR / f"project_{project_id}"
     project_dir.mkdir(parents=True, exist_ok=True)
     
-    # Upload to local storage
+    # Stream to local storage, enforcing the size limit as chunks arrive
     local_file_path = project_dir / unique_filename
-    with open(local_file_path, "wb") as f:
-        f.write(file_content)
+    file_size = await save_upload(file, local_file_path, app_settings.MAX_FILE_SIZE)
+    if file_size is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size exceeds maximum allowed size of {app_settings.MAX_FILE_SIZE / (1024*1024)}MB"
+        )
     storage_path = str(local_file_path)
     
     # Create database record
@@ -254,18 +272,6 @@ async def upload_company_logo(
             detail=f"Only image files are allowed. Supported formats: {', '.join(allowed_image_extensions)}"
         )
     
-    # Read file content
-    file_content = await file.read()
-    file_size = len(file_content)
-    
-    # Check file size (max 5MB for logos)
-    max_logo_size = 5 * 1024 * 1024  # 5MB
-    if file_size > max_logo_size:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File size exceeds maximum allowed size of 5MB"
-        )
-    
     # Create logos directory
     logos_dir = UPLOAD_DIR / "company_logos"
     logos_dir.mkdir(parents=True, exist_ok=True)
@@ -274,9 +280,13 @@ async def upload_company_logo(
     unique_filename = f"user_{current_user.id}_{uuid.uuid4()}{file_ext}"
     logo_path = logos_dir / unique_filename
     
-    # Save file
-    with open(logo_path, "wb") as f:
-        f.write(file_content)
+    # Save file (max 5MB for logos)
+    max_logo_size = 5 * 1024 * 1024  # 5MB
+    if await save_upload(file, logo_path, max_logo_size) is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size exceeds maximum allowed size of 5MB"
+        )
     
     # Update user's company_logo field
     current_user.company_logo = f"/uploads/company_logos/{unique_filename}"
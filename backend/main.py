@@ -1,7 +1,7 @@
 from fastapi import FastAPI, Request, status, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
@@ -118,6 +118,9 @@ async def lifespan(app: FastAPI):
     # They will be initialized when first accessed
     print("[INFO] RAG services will be initialized on first use")
 
+    from utils.email_service import start_email_workers
+    start_email_workers()
+
     print("[INFO] Startup complete - server ready to accept requests")
     
     # Startup complete, yield control
@@ -126,21 +129,33 @@ async def lifespan(app: FastAPI):
         yield
     finally:
         # Shutdown cleanup - handle cancellation gracefully
+        print("[INFO] Shutting down gracefully...")
         try:
-            print("[INFO] Shutting down gracefully...")
+            from utils.email_service import stop_email_workers
+            await stop_email_workers()
         except (asyncio.CancelledError, KeyboardInterrupt):
             # Suppress cancellation errors during shutdown - they're expected
             pass
         except Exception as e:
             # Log but don't raise other exceptions during shutdown
-            print(f"[WARNING] Error during shutdown cleanup: {e}")
+            print(f"[WARNING] Error stopping email workers: {e}")
+        
+        # Separate step so an email shutdown error can't skip closing the Gemini client
+        try:
+            from utils.gemini_service import close_gemini_service
+            await close_gemini_service()
+        except (asyncio.CancelledError, KeyboardInterrupt):
+            pass
+        except Exception as e:
+            print(f"[WARNING] Error closing Gemini client: {e}")
 
 
 app = FastAPI(
     title="NovaIntel API",
     description="AI-powered presales platform backend API",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # -----------------------------------------------------
@@ -0,0 +1,65 @@
+"""
+Shared cache for deterministic LLM responses.
+"""
+import hashlib
+import json
+import threading
+from typing import Optional, List, Dict, Any
+from services.cache.cache_manager import cache_manager
+from utils.config import settings
+
+# Calls above this temperature are sampled, so their responses are never reused
+LLM_CACHE_MAX_TEMPERATURE = 0.1
+
+
+class LLMCache:    
+    """
+    Redis-backed cache of LLM response text for low-temperature calls.
+    
+    GeminiService already keeps an in-process response cache; this layer
+    lets every worker process reuse a response another one already paid for.
+    """
+    
+    def __init__(self):
+        self.cache = cache_manager
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+    
+    @staticmethod
+    def cache_key(
+        model: str,
+        temperature: float,
+        messages: Optional[List[Dict[str, str]]] = None,
+        prompt: Optional[str] = None,
+        system: Optional[str] = None
+    ) -> Optional[str]:
+        """Key for a call, or None when the call is not deterministic enough to cache."""
+        if temperature > LLM_CACHE_MAX_TEMPERATURE:
+            return None
+        payload = {
+            "model": model,
+            "temperature": temperature,
+            "messages": messages,
+            "prompt": prompt,
+            "system": system
+        }
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+        return f"llm:response:{digest}"
+    
+    def get(self, key: Optional[str]) -> Optional[str]:
+        """Cached response text for a key from cache_key."""
+        if key is None or not self.cache.is_available():
+            return None
+        content = self.cache.get(key)
+        with self._lock:
+            self.stats["hits" if content is not None else "misses"] += 1
+        return content
+    
+    def set(self, key: Optional[str], content: str, ttl: Optional[int] = None) -> bool:
+        """Cache response text under a key from cache_key."""
+        if key is None or content is None or not self.cache.is_available():
+            return False
+        return self.cache.set(key, content, ttl or settings.CACHE_TTL)
+
+# Global instance
+llm_cache = LLMCache()
@@ -11,7 +11,7 @@ from models.proposal import Proposal
 from models.project import Project
 from models.user import User
 from models.notification import Notification
-from utils.email_service import send_proposal_submission_email
+from utils.email_service import send_proposal_submission_email_bulk
 
 
 class ProposalService:
@@ -162,12 +162,12 @@ class ProposalService:
                 metadata_={"proposal_id": proposal.id, "project_id": project.id, "submitter_id": user.id}
             )
             self.db.add(notification)
-            
-            # Send email notification
+        
+        # Send email notification to all admins
+        if admins:
             try:
-                await send_proposal_submission_email(
-                    manager_email=admin.email,
-                    manager_name=admin.full_name,
+                await send_proposal_submission_email_bulk(
+                    [(admin.email, admin.full_name) for admin in admins],
                     proposal_title=proposal.title,
                     submitter_name=user.full_name,
                     submitter_message=message,
@@ -183,7 +183,7 @@ class ProposalService:
                 )
             except Exception as e:
                 # Error already logged in email_service with full details
-                print(f"[PROPOSAL SUBMISSION WARNING] Email notification failed for admin: {admin.email}, Proposal ID: {proposal.id}", file=sys.stderr, flush=True)
+                print(f"[PROPOSAL SUBMISSION WARNING] Email notifications failed for admins, Proposal ID: {proposal.id}", file=sys.stderr, flush=True)
         
         self.db.commit()
         self.db.refresh(proposal)
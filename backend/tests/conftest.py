@@ -2,14 +2,22 @@
 Pytest configuration and fixtures for NovaIntel tests
 """
 import pytest
+import asyncio
 import sys
 from pathlib import Path
-from typing import Generator, Dict, Any
+from typing import AsyncGenerator, Generator, Dict, Any, List
+import httpx
+from asgi_lifespan import LifespanManager
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 import os
+import threading
+import time
+import uvicorn
+import websockets
 
 # Add backend directory to path
 backend_dir = Path(__file__).parent.parent
@@ -18,9 +26,11 @@ sys.path.insert(0, str(backend_dir))
 from main import app
 from db.database import Base, get_db
 from models import User, Project, RFPDocument, Proposal, CaseStudy
-from utils.auth import get_password_hash, create_access_token
+from models.project import ProjectStatus
+from utils.security import get_password_hash, create_access_token
 
-# Test database URL (in-memory SQLite)
+# Test database URL (in-memory SQLite). Each pytest-xdist worker is its own
+# process, so every worker gets a private database without extra setup.
 SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///:memory:"
 
 # Create test engine
@@ -33,20 +43,64 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-@pytest.fixture(scope="function")
-def db() -> Generator[Session, None, None]:
-    """Create a fresh database for each test"""
+# pysqlite's own transaction handling breaks SAVEPOINT; let SQLAlchemy emit BEGIN
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(scope="session")
+def db_schema() -> Generator[None, None, None]:
+    """Create all tables once for the session"""
     Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def db(db_schema) -> Generator[Session, None, None]:
+    """Session inside a per-test transaction that is rolled back afterwards.
+
+    Commits from tests or the app only release a SAVEPOINT, so every test
+    starts from the session's seed users without recreating the schema.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="session")
+def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
+    """Share one event loop so session-scoped async fixtures can be reused"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+async def app_instance() -> AsyncGenerator[FastAPI, None]:
+    """Run the application lifespan once for the whole session.
+
+    Tests that need different app state must use ``app.dependency_overrides``
+    rather than relying on a fresh startup per test.
+    """
+    async with LifespanManager(app):
+        yield app
 
 
 @pytest.fixture(scope="function")
-def client(db: Session) -> Generator[TestClient, None, None]:
+def client(db: Session, app_instance: FastAPI) -> Generator[TestClient, None, None]:
     """Create a test client with database dependency override"""
     def override_get_db():
         try:
@@ -54,115 +108,224 @@ def client(db: Session) -> Generator[TestClient, None, None]:
         finally:
             pass
     
+    app_instance.dependency_overrides[get_db] = override_get_db
+    # No context manager: the lifespan already ran once in app_instance
+    yield TestClient(app_instance)
+    app_instance.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="session")
+async def shared_async_client(
+    app_instance: FastAPI
+) -> AsyncGenerator[httpx.AsyncClient, None]:
+    """Single pooled HTTP client reused by every async test in the session"""
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app_instance),
+        base_url="http://test",
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    ) as shared_client:
+        yield shared_client
+
+
+@pytest.fixture(scope="function")
+async def async_client(
+    shared_async_client: httpx.AsyncClient, db: Session
+) -> AsyncGenerator[httpx.AsyncClient, None]:
+    """Shared async client with the per-test database dependency override"""
+    def override_get_db():
+        try:
+            yield db
+        finally:
+            pass
+
     app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
-        yield test_client
+    yield shared_async_client
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
-def test_user(db: Session) -> User:
-    """Create a test user"""
-    user = User(
-        email="test@example.com",
-        full_name="Test User",
-        hashed_password=get_password_hash("Test123456!"),
-        is_active=True,
-        is_verified=True,
-        role="user"
+@pytest.fixture(scope="session")
+def live_db(
+    test_user: User, test_admin: User, tmp_path_factory
+) -> Generator[sessionmaker, None, None]:
+    """Session factory for the live server's own file database.
+
+    Seeded with copies of the test users (same ids, so their tokens work).
+    Rows tests add here are not rolled back; give them their own conversation.
+    """
+    live_engine = create_engine(
+        f"sqlite:///{tmp_path_factory.mktemp('live_server') / 'live.db'}",
+        connect_args={"check_same_thread": False},
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    Base.metadata.create_all(bind=live_engine)
+    LiveSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=live_engine)
+    session = LiveSessionLocal()
+    try:
+        session.add_all([
+            User(
+                id=user.id,
+                email=user.email,
+                full_name=user.full_name,
+                hashed_password=user.hashed_password,
+                is_active=True,
+                email_verified=True,
+                role=user.role
+            )
+            for user in (test_user, test_admin)
+        ])
+        session.commit()
+    finally:
+        session.close()
+    yield LiveSessionLocal
+    live_engine.dispose()
 
 
-@pytest.fixture
-def test_admin(db: Session) -> User:
-    """Create a test admin user"""
-    admin = User(
-        email="admin@example.com",
-        full_name="Admin User",
-        hashed_password=get_password_hash("Admin123456!"),
-        is_active=True,
-        is_verified=True,
-        role="admin"
-    )
-    db.add(admin)
-    db.commit()
-    db.refresh(admin)
-    return admin
+@pytest.fixture(scope="session")
+def live_server(app_instance: FastAPI, live_db: sessionmaker) -> Generator[str, None, None]:
+    """Serve the app over real loopback TCP once for the session.
+
+    The WebSocket endpoint opens its own ``SessionLocal`` instead of using
+    ``get_db``; it is pointed at ``live_db`` so the server thread never
+    touches the shared in-memory connection the per-test transactions use.
+    """
+    config = uvicorn.Config(app_instance, host="127.0.0.1", port=0, lifespan="off", log_level="error")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("db.database.SessionLocal", live_db)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not server.started:
+            if not thread.is_alive() or time.monotonic() > deadline:
+                pytest.fail("live server did not start")
+            time.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        yield f"ws://127.0.0.1:{port}"
+        server.should_exit = True
+        thread.join(timeout=10)
 
 
 @pytest.fixture
-def test_analyst(db: Session) -> User:
-    """Create a test analyst user"""
-    analyst = User(
-        email="analyst@example.com",
-        full_name="Analyst User",
-        hashed_password=get_password_hash("Analyst123456!"),
-        is_active=True,
-        is_verified=True,
-        role="analyst"
-    )
-    db.add(analyst)
-    db.commit()
-    db.refresh(analyst)
-    return analyst
+async def ws_connection(live_server: str, test_user: User, auth_token: str):
+    """Authenticated chat WebSocket against the live server, closed after the test.
 
+    The first frame on the socket is the server's connection confirmation.
+    Closing it lets the endpoint release its database session.
+    """
+    async with websockets.connect(
+        f"{live_server}/chat/ws/{test_user.id}?token={auth_token}"
+    ) as websocket:
+        yield websocket
 
-@pytest.fixture
+
+def _seed_user(email: str, full_name: str, password: str, role: str) -> User:
+    """Commit a user outside the per-test transactions and return it detached"""
+    session = TestingSessionLocal(expire_on_commit=False)
+    try:
+        user = User(
+            email=email,
+            full_name=full_name,
+            hashed_password=get_password_hash(password),
+            is_active=True,
+            email_verified=True,
+            role=role
+        )
+        session.add(user)
+        session.commit()
+        return user
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def test_user(db_schema) -> User:
+    """Create a test user once for the session"""
+    return _seed_user("test@example.com", "Test User", "Test123456!", "user")
+
+
+@pytest.fixture(scope="session")
+def test_admin(db_schema) -> User:
+    """Create a test admin user once for the session"""
+    return _seed_user("admin@example.com", "Admin User", "Admin123456!", "admin")
+
+
+@pytest.fixture(scope="session")
+def test_analyst(db_schema) -> User:
+    """Create a test analyst user once for the session"""
+    return _seed_user("analyst@example.com", "Analyst User", "Analyst123456!", "analyst")
+
+
+@pytest.fixture(scope="session")
 def auth_token(test_user: User) -> str:
-    """Generate authentication token for test user"""
-    return create_access_token(data={"sub": test_user.email})
+    """Sign a token for the test user with the app's own helper"""
+    return create_access_token(data={"sub": test_user.email, "user_id": test_user.id})
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def admin_token(test_admin: User) -> str:
-    """Generate authentication token for admin user"""
-    return create_access_token(data={"sub": test_admin.email})
+    """Sign a token for the admin user with the app's own helper"""
+    return create_access_token(data={"sub": test_admin.email, "user_id": test_admin.id})
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def analyst_token(test_analyst: User) -> str:
-    """Generate authentication token for analyst user"""
-    return create_access_token(data={"sub": test_analyst.email})
+    """Sign a token for the analyst user with the app's own helper"""
+    return create_access_token(data={"sub": test_analyst.email, "user_id": test_analyst.id})
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def auth_headers(auth_token: str) -> Dict[str, str]:
     """Get authentication headers"""
     return {"Authorization": f"Bearer {auth_token}"}
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def admin_headers(admin_token: str) -> Dict[str, str]:
     """Get admin authentication headers"""
     return {"Authorization": f"Bearer {admin_token}"}
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def analyst_headers(analyst_token: str) -> Dict[str, str]:
     """Get analyst authentication headers"""
     return {"Authorization": f"Bearer {analyst_token}"}
 
 
+@pytest.fixture(scope="module")
+def test_project(test_user: User) -> Generator[Project, None, None]:
+    """Create a test project once per module.
+
+    Like the seed users it is committed outside the per-test transactions, so
+    rows tests attach to it are still rolled back; the project itself is
+    removed when the module finishes.
+    """
+    session = TestingSessionLocal(expire_on_commit=False)
+    try:
+        project = Project(
+            name="Test Project",
+            description="Test project description",
+            client_name="Test Client",
+            industry="Technology",
+            region="North America",
+            owner_id=test_user.id,
+            status=ProjectStatus.ACTIVE
+        )
+        session.add(project)
+        session.commit()
+        yield project
+        session.query(Project).filter(Project.id == project.id).delete()
+        session.commit()
+    finally:
+        session.close()
+
+
 @pytest.fixture
-def test_project(db: Session, test_user: User) -> Project:
-    """Create a test project"""
-    project = Project(
-        title="Test Project",
-        description="Test project description",
-        client_name="Test Client",
-        industry="Technology",
-        region="North America",
-        user_id=test_user.id,
-        status="active"
-    )
-    db.add(project)
-    db.commit()
-    db.refresh(project)
-    return project
+def factories(db: Session):
+    """Bind the model factories to the per-test session"""
+    from tests import factories as factory_module
+
+    factory_module.ProjectFactory._meta.sqlalchemy_session = db
+    yield factory_module
+    factory_module.ProjectFactory._meta.sqlalchemy_session = None
 
 
 @pytest.fixture
@@ -210,6 +373,77 @@ def sample_rfp_content() -> str:
     """
 
 
+# Canned generateContent payload served instead of a real Gemini round-trip
+FAKE_GEMINI_RESPONSE = {
+    "candidates": [
+        {"content": {"parts": [{"text": "Stubbed Gemini response"}], "role": "model"}}
+    ]
+}
+
+
+@pytest.fixture
+def stub_gemini(monkeypatch) -> Dict[str, Any]:
+    """Serve Gemini API calls from memory instead of the network"""
+    from utils.gemini_service import GeminiService
+
+    monkeypatch.setattr(GeminiService, "is_available", lambda self: True)
+    monkeypatch.setattr(
+        GeminiService, "_make_request", lambda self, url, payload: FAKE_GEMINI_RESPONSE
+    )
+    return FAKE_GEMINI_RESPONSE
+
+
+@pytest.fixture
+def stub_rag(monkeypatch, stub_gemini):
+    """Replace vector store, embedding and retrieval calls with in-memory stubs"""
+    from rag.index_builder import index_builder
+    from rag.retriever import retriever
+    from rag.chat_service import chat_service
+    from rag.vector_store import vector_store_manager
+    from rag.embedding_service import embedding_service
+
+    monkeypatch.setattr(vector_store_manager, "is_available", lambda: True)
+    monkeypatch.setattr(embedding_service, "is_available", lambda: True)
+    monkeypatch.setattr(
+        index_builder,
+        "build_index_from_file",
+        lambda **kwargs: {
+            "success": True,
+            "chunk_count": 1,
+            "document_id": kwargs.get("rfp_document_id"),
+        },
+    )
+    monkeypatch.setattr(
+        retriever,
+        "get_nodes_with_metadata",
+        lambda query, project_id, top_k=5: [
+            {"text": "Stubbed context", "score": 1.0, "metadata": {"project_id": project_id}}
+        ],
+    )
+    monkeypatch.setattr(
+        chat_service,
+        "chat",
+        lambda query, project_id, conversation_history=None, top_k=5: {
+            "success": True,
+            "answer": "Stubbed answer",
+            "sources": [],
+            "context_used": 1,
+            "query": query,
+        },
+    )
+
+
+@pytest.fixture
+def stub_proposal_export(monkeypatch, tmp_path):
+    """Skip PDF and PPTX rendering and write exports to a temporary directory"""
+    from io import BytesIO
+    from services.proposal_export import proposal_exporter
+
+    monkeypatch.setattr(proposal_exporter, "export_pdf", lambda **kwargs: BytesIO(b"%PDF"))
+    monkeypatch.setattr(proposal_exporter, "export_pptx", lambda **kwargs: BytesIO(b"PK\x03\x04"))
+    monkeypatch.setattr(proposal_exporter, "export_dir", tmp_path)
+
+
 @pytest.fixture
 def mock_env_vars(monkeypatch):
     """Mock environment variables for testing"""
@@ -219,34 +453,32 @@ def mock_env_vars(monkeypatch):
     monkeypatch.setenv("ENVIRONMENT", "test")
 
 
-# Performance tracking fixtures
-@pytest.fixture
-def performance_tracker():
-    """Track performance metrics during tests"""
-    import time
-    
-    class PerformanceTracker:
+@pytest.fixture(scope="session")
+def query_counter():
+    """Record SQL statements issued against the test engine (N+1 guard).
+
+    Shared across the session; call ``reset()`` right before the request
+    under test.
+    """
+
+    class QueryCounter:
         def __init__(self):
-            self.metrics = {}
-        
-        def start(self, name: str):
-            self.metrics[name] = {"start": time.time()}
-        
-        def end(self, name: str):
-            if name in self.metrics:
-                self.metrics[name]["end"] = time.time()
-                self.metrics[name]["duration"] = (
-                    self.metrics[name]["end"] - self.metrics[name]["start"]
-                )
-        
-        def get_duration(self, name: str) -> float:
-            return self.metrics.get(name, {}).get("duration", 0)
-        
-        def assert_within_threshold(self, name: str, threshold: float):
-            duration = self.get_duration(name)
-            assert duration <= threshold, (
-                f"{name} took {duration:.3f}s, expected <= {threshold}s"
-            )
-    
-    return PerformanceTracker()
+            self.statements: List[str] = []
+
+        @property
+        def count(self) -> int:
+            return len(self.statements)
+
+        def reset(self):
+            self.statements.clear()
+
+        def record(self, conn, cursor, statement, parameters, context, executemany):
+            # Savepoints come from the per-test transaction, not the handler
+            if not statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+                self.statements.append(statement)
+
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter.record)
+    yield counter
+    event.remove(engine, "before_cursor_execute", counter.record)
 
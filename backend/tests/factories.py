@@ -0,0 +1,31 @@
+"""
+factory_boy model factories for test data
+"""
+import factory
+from factory.alchemy import SQLAlchemyModelFactory
+
+from models import Project
+
+
+class BaseFactory(SQLAlchemyModelFactory):
+    """Base factory; the session is bound per test by the ``factories`` fixture.
+
+    Objects are only added to the session (no per-row flush/commit), so a
+    single ``db.commit()`` after ``create_batch`` flushes all rows together
+    and SQLAlchemy batches them into one multi-row INSERT.
+    """
+
+    class Meta:
+        abstract = True
+        sqlalchemy_session = None
+        sqlalchemy_session_persistence = None
+
+
+class ProjectFactory(BaseFactory):
+    class Meta:
+        model = Project
+
+    name = factory.Sequence(lambda n: f"Project {n}")
+    client_name = factory.Sequence(lambda n: f"Client {n}")
+    industry = "Technology"
+    region = "North America"
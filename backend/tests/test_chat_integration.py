@@ -3,9 +3,35 @@ Chat System Integration Tests
 Test chat functionality including WebSocket connections
 """
 import pytest
+import asyncio
 import json
+import httpx
+import websockets
 from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
+
+
+def _live_conversation(live_db: sessionmaker, *user_ids: int) -> int:
+    """Commit a conversation between the given users to the live server's database"""
+    from models import Conversation, ConversationParticipant
+    
+    session = live_db()
+    try:
+        conversation = Conversation(is_group=len(user_ids) > 2)
+        session.add(conversation)
+        session.flush()
+        session.add_all([
+            ConversationParticipant(conversation_id=conversation.id, user_id=user_id)
+            for user_id in user_ids
+        ])
+        session.commit()
+        return conversation.id
+    finally:
+        session.close()
+
+
+async def _recv_json(websocket) -> dict:
+    return json.loads(await asyncio.wait_for(websocket.recv(), timeout=5))
 
 
 @pytest.mark.integration
@@ -13,105 +39,112 @@ from sqlalchemy.orm import Session
 class TestChatSystem:
     """Test chat system and WebSocket functionality"""
     
-    def test_create_conversation(
-        self, client: TestClient, auth_headers, test_user, test_admin, db: Session
+    async def test_create_conversation(
+        self, async_client: httpx.AsyncClient, auth_headers, test_user, test_admin, db: Session
     ):
         """Test creating a new conversation"""
         conversation_data = {
-            "title": "Test Chat",
+            "name": "Test Chat",
             "participant_ids": [test_user.id, test_admin.id]
         }
         
-        response = client.post(
+        response = await async_client.post(
             "/chat/conversations",
             json=conversation_data,
             headers=auth_headers
         )
         
-        assert response.status_code in [200, 201]
+        assert response.status_code == 201
         data = response.json()
-        assert data["title"] == conversation_data["title"]
-        assert "id" in data
+        assert data["name"] == conversation_data["name"]
+        assert data["is_group"] is True
+        assert {p["id"] for p in data["participants"]} == {test_user.id, test_admin.id}
     
-    def test_list_conversations(self, client: TestClient, auth_headers):
-        """Test listing user's conversations"""
-        response = client.get("/chat/conversations", headers=auth_headers)
-        assert response.status_code == 200
-        data = response.json()
-        assert isinstance(data, list)
-    
-    def test_get_conversation(
-        self, client: TestClient, auth_headers, db: Session, test_user
+    async def test_list_conversations_constant_queries(
+        self, async_client: httpx.AsyncClient, auth_headers, db: Session,
+        test_user, test_admin, query_counter
     ):
-        """Test getting specific conversation"""
-        from models import Conversation
-        
-        conversation = Conversation(
-            title="Test Conversation",
-            created_by=test_user.id
-        )
-        db.add(conversation)
-        db.commit()
-        db.refresh(conversation)
+        """Test listing user's conversations without per-row queries (selectinload)"""
+        from models import Conversation, ConversationParticipant, Message
         
-        response = client.get(
-            f"/chat/conversations/{conversation.id}",
-            headers=auth_headers
-        )
+        conversations = [Conversation(is_group=False) for _ in range(3)]
+        db.add_all(conversations)
+        db.flush()
+        for conversation in conversations:
+            db.add_all([
+                ConversationParticipant(conversation_id=conversation.id, user_id=user_id)
+                for user_id in (test_user.id, test_admin.id)
+            ])
+            db.add(Message(
+                conversation_id=conversation.id,
+                sender_id=test_admin.id,
+                content=f"Hello from {conversation.id}"
+            ))
+        db.flush()
         
+        query_counter.reset()
+        response = await async_client.get("/chat/conversations", headers=auth_headers)
         assert response.status_code == 200
         data = response.json()
-        assert data["id"] == conversation.id
+        assert data["total"] == len(data["conversations"]) >= 3
+        assert all(c["last_message"] is not None for c in data["conversations"])
+        assert all(c["unread_count"] == 1 for c in data["conversations"])
+        # Auth, participant ids, conversations + participants/users (selectinload),
+        # last messages and unread counts: the same for 3 conversations or 300
+        assert query_counter.count <= 6
     
-    def test_send_message(
-        self, client: TestClient, auth_headers, db: Session, test_user
+    async def test_get_conversation(
+        self, async_client: httpx.AsyncClient, auth_headers, db: Session, test_user, test_admin
     ):
-        """Test sending a message in conversation"""
+        """Test a conversation shows up in the participant's list with its members"""
         from models import Conversation, ConversationParticipant
         
-        conversation = Conversation(
-            title="Test Chat",
-            created_by=test_user.id
-        )
+        conversation = Conversation(name="Test Conversation", is_group=True)
         db.add(conversation)
-        db.commit()
-        db.refresh(conversation)
+        db.flush()
+        db.add_all([
+            ConversationParticipant(conversation_id=conversation.id, user_id=user_id)
+            for user_id in (test_user.id, test_admin.id)
+        ])
+        db.flush()
         
-        # Add user as participant
-        participant = ConversationParticipant(
-            conversation_id=conversation.id,
-            user_id=test_user.id
-        )
-        db.add(participant)
-        db.commit()
+        response = await async_client.get("/chat/conversations", headers=auth_headers)
         
-        message_data = {
-            "content": "Test message",
-            "conversation_id": conversation.id
+        assert response.status_code == 200
+        conversations = {c["id"]: c for c in response.json()["conversations"]}
+        assert conversations[conversation.id]["name"] == "Test Conversation"
+        assert {p["id"] for p in conversations[conversation.id]["participants"]} == {
+            test_user.id, test_admin.id
         }
+    
+    async def test_send_message(self, ws_connection, live_db, test_user, test_admin):
+        """Test sending a message over the live WebSocket"""
+        conversation_id = _live_conversation(live_db, test_user.id, test_admin.id)
+        await _recv_json(ws_connection)  # connection confirmation
         
-        response = client.post(
-            "/chat/messages",
-            json=message_data,
-            headers=auth_headers
-        )
+        await ws_connection.send(json.dumps({
+            "type": "message",
+            "conversation_id": conversation_id,
+            "content": "Test message"
+        }))
         
-        assert response.status_code in [200, 201]
-        data = response.json()
-        assert data["content"] == message_data["content"]
+        data = await _recv_json(ws_connection)
+        assert data["type"] == "message"
+        assert data["conversation_id"] == conversation_id
+        assert data["message"]["content"] == "Test message"
+        assert data["message"]["sender_id"] == test_user.id
     
-    def test_get_messages(
-        self, client: TestClient, auth_headers, db: Session, test_user
+    async def test_get_messages(
+        self, async_client: httpx.AsyncClient, auth_headers, db: Session, test_user,
+        query_counter
     ):
         """Test retrieving messages from conversation"""
+        from sqlalchemy import insert
         from models import Conversation, Message, ConversationParticipant
         
-        conversation = Conversation(
-            title="Test Chat",
-            created_by=test_user.id
-        )
+        conversation = Conversation(is_group=False)
         db.add(conversation)
-        db.commit()
+        db.flush()
         
         # Add participant
         participant = ConversationParticipant(
@@ -119,19 +152,25 @@ class TestChatSystem:
             user_id=test_user.id
         )
         db.add(participant)
-        db.commit()
         
-        # Add messages
-        for i in range(5):
-            message = Message(
-                conversation_id=conversation.id,
-                user_id=test_user.id,
-                content=f"Message {i}"
-            )
-            db.add(message)
-        db.commit()
+        # Add messages in a single INSERT ... RETURNING
+        message_ids = db.execute(
+            insert(Message).returning(Message.id),
+            [
+                {
+                    "conversation_id": conversation.id,
+                    "sender_id": test_user.id,
+                    "content": f"Message {i}"
+                }
+                for i in range(5)
+            ]
+        ).scalars().all()
+        # Flush, not commit: committing would expire conversation and cost a
+        # reload inside the counted window
+        db.flush()
         
-        response = client.get(
+        query_counter.reset()
+        response = await async_client.get(
             f"/chat/conversations/{conversation.id}/messages",
             headers=auth_headers
         )
@@ -139,122 +178,111 @@ class TestChatSystem:
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 5
+        assert {m["id"] for m in data} == set(message_ids)
+        # Auth, participant check, messages+senders, mark-read update and
+        # last_read_at flush: constant regardless of message count (no N+1)
+        assert query_counter.count <= 5
     
     @pytest.mark.slow
     def test_message_delivery_performance(
         self, client: TestClient, auth_headers, db: Session,
-        test_user, performance_tracker
+        test_user, test_admin, benchmark, query_counter
     ):
         """Test message delivery performance (< 500ms)"""
-        from models import Conversation, ConversationParticipant
+        from models import Conversation, ConversationParticipant, Message
         
-        conversation = Conversation(
-            title="Performance Test",
-            created_by=test_user.id
-        )
+        conversation = Conversation(is_group=False)
         db.add(conversation)
-        db.commit()
-        
-        participant = ConversationParticipant(
-            conversation_id=conversation.id,
-            user_id=test_user.id
-        )
-        db.add(participant)
-        db.commit()
+        db.flush()
+        db.add_all([
+            ConversationParticipant(conversation_id=conversation.id, user_id=user_id)
+            for user_id in (test_user.id, test_admin.id)
+        ])
+        db.add_all([
+            Message(
+                conversation_id=conversation.id,
+                sender_id=test_admin.id,
+                content=f"Performance test message {i}"
+            )
+            for i in range(20)
+        ])
+        db.flush()
+        url = f"/chat/conversations/{conversation.id}/messages"
         
-        message_data = {
-            "content": "Performance test message",
-            "conversation_id": conversation.id
-        }
+        # Sending happens over the WebSocket; over HTTP, messages are
+        # delivered by this fetch
+        query_counter.reset()
+        response = client.get(url, headers=auth_headers)
         
-        performance_tracker.start("message_send")
-        response = client.post(
-            "/chat/messages",
-            json=message_data,
-            headers=auth_headers
-        )
-        performance_tracker.end("message_send")
+        assert response.status_code == 200
+        assert len(response.json()) == 20
+        assert query_counter.count <= 5
         
-        assert response.status_code in [200, 201]
-        # Message should be sent within 500ms
-        performance_tracker.assert_within_threshold("message_send", 0.5)
+        benchmark.group = "chat"
+        response = benchmark(client.get, url, headers=auth_headers)
+        assert response.status_code == 200
+        # Median delivery should be within 500ms
+        if benchmark.stats:
+            assert benchmark.stats.stats.median <= 0.5
     
-    def test_mark_messages_read(
-        self, client: TestClient, auth_headers, db: Session, test_user
+    async def test_mark_messages_read(
+        self, async_client: httpx.AsyncClient, auth_headers, db: Session, test_user, test_admin
     ):
-        """Test marking messages as read"""
+        """Test fetching a conversation marks the other participant's messages read"""
         from models import Conversation, Message, ConversationParticipant
         
-        conversation = Conversation(
-            title="Test Chat",
-            created_by=test_user.id
-        )
+        conversation = Conversation(is_group=False)
         db.add(conversation)
-        db.commit()
-        
-        participant = ConversationParticipant(
-            conversation_id=conversation.id,
-            user_id=test_user.id
-        )
-        db.add(participant)
-        
+        db.flush()
+        db.add_all([
+            ConversationParticipant(conversation_id=conversation.id, user_id=user_id)
+            for user_id in (test_user.id, test_admin.id)
+        ])
         message = Message(
             conversation_id=conversation.id,
-            user_id=test_user.id,
+            sender_id=test_admin.id,
             content="Test message"
         )
         db.add(message)
-        db.commit()
-        db.refresh(message)
+        db.flush()
         
-        response = client.post(
-            f"/chat/messages/{message.id}/read",
+        response = await async_client.get(
+            f"/chat/conversations/{conversation.id}/messages",
             headers=auth_headers
         )
         
-        assert response.status_code in [200, 204]
+        assert response.status_code == 200
+        assert response.json()[0]["is_read"] is True
+        db.refresh(message)
+        assert message.is_read is True
     
-    def test_websocket_connection(self, client: TestClient, auth_token, test_user):
-        """Test WebSocket connection establishment"""
-        # Note: TestClient WebSocket support is limited
-        # This is a basic connectivity test
-        try:
-            with client.websocket_connect(
-                f"/chat/ws/{test_user.id}?token={auth_token}"
-            ) as websocket:
-                # Connection established
-                assert websocket is not None
-        except Exception as e:
-            # WebSocket may not work with TestClient
-            pytest.skip(f"WebSocket testing requires real server: {e}")
+    async def test_websocket_connection(self, ws_connection, test_user):
+        """Test WebSocket connection establishment against the live server"""
+        greeting = json.loads(await asyncio.wait_for(ws_connection.recv(), timeout=5))
+        assert greeting["type"] == "connection"
+        assert greeting["status"] == "connected"
+        assert greeting["user_id"] == test_user.id
     
-    def test_typing_indicator(
-        self, client: TestClient, auth_headers, db: Session, test_user
+    async def test_typing_indicator(
+        self, ws_connection, live_server, live_db, test_user, test_admin, admin_token
     ):
-        """Test typing indicator functionality"""
-        from models import Conversation, ConversationParticipant
+        """Test typing indicators reach the other participant"""
+        conversation_id = _live_conversation(live_db, test_user.id, test_admin.id)
         
-        conversation = Conversation(
-            title="Test Chat",
-            created_by=test_user.id
-        )
-        db.add(conversation)
-        db.commit()
-        
-        participant = ConversationParticipant(
-            conversation_id=conversation.id,
-            user_id=test_user.id
-        )
-        db.add(participant)
-        db.commit()
-        
-        # Test typing indicator endpoint if it exists
-        response = client.post(
-            f"/chat/conversations/{conversation.id}/typing",
-            json={"is_typing": True},
-            headers=auth_headers
-        )
-        
-        # May or may not be implemented
-        assert response.status_code in [200, 404]
-
+        async with websockets.connect(
+            f"{live_server}/chat/ws/{test_admin.id}?token={admin_token}"
+        ) as admin_ws:
+            await _recv_json(ws_connection)
+            await _recv_json(admin_ws)
+            
+            await ws_connection.send(json.dumps({
+                "type": "typing",
+                "conversation_id": conversation_id,
+                "is_typing": True
+            }))
+            
+            data = await _recv_json(admin_ws)
+            assert data["type"] == "typing"
+            assert data["conversation_id"] == conversation_id
+            assert data["user_id"] == test_user.id
+            assert data["is_typing"] is True
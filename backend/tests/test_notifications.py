@@ -2,6 +2,7 @@
 Notifications Tests
 """
 import pytest
+import httpx
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
@@ -10,15 +11,15 @@ from sqlalchemy.orm import Session
 class TestNotifications:
     """Test notification system"""
     
-    def test_get_notifications(self, client: TestClient, auth_headers):
+    async def test_get_notifications(self, async_client: httpx.AsyncClient, auth_headers):
         """Test getting user notifications"""
-        response = client.get("/notifications/", headers=auth_headers)
+        response = await async_client.get("/notifications/", headers=auth_headers)
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, list)
     
-    def test_create_notification(
-        self, client: TestClient, db: Session, test_user
+    async def test_create_notification(
+        self, async_client: httpx.AsyncClient, db: Session, test_user
     ):
         """Test creating a notification"""
         from models import Notification
@@ -30,14 +31,13 @@ class TestNotifications:
             type="info"
         )
         db.add(notification)
-        db.commit()
-        db.refresh(notification)
+        db.flush()
         
         assert notification.id is not None
         assert notification.is_read is False
     
-    def test_mark_notification_read(
-        self, client: TestClient, auth_headers, db: Session, test_user
+    async def test_mark_notification_read(
+        self, async_client: httpx.AsyncClient, auth_headers, db: Session, test_user
     ):
         """Test marking notification as read"""
         from models import Notification
@@ -49,27 +49,26 @@ class TestNotifications:
             type="info"
         )
         db.add(notification)
-        db.commit()
-        db.refresh(notification)
+        db.flush()
         
-        response = client.put(
+        response = await async_client.put(
             f"/notifications/{notification.id}/read",
             headers=auth_headers
         )
         
         assert response.status_code in [200, 204]
     
-    def test_mark_all_read(self, client: TestClient, auth_headers):
+    async def test_mark_all_read(self, async_client: httpx.AsyncClient, auth_headers):
         """Test marking all notifications as read"""
-        response = client.put(
+        response = await async_client.put(
             "/notifications/mark-all-read",
             headers=auth_headers
         )
         
         assert response.status_code in [200, 204]
     
-    def test_delete_notification(
-        self, client: TestClient, auth_headers, db: Session, test_user
+    async def test_delete_notification(
+        self, async_client: httpx.AsyncClient, auth_headers, db: Session, test_user
     ):
         """Test deleting a notification"""
         from models import Notification
@@ -81,10 +80,9 @@ class TestNotifications:
             type="info"
         )
         db.add(notification)
-        db.commit()
-        db.refresh(notification)
+        db.flush()
         
-        response = client.delete(
+        response = await async_client.delete(
             f"/notifications/{notification.id}",
             headers=auth_headers
         )
@@ -93,14 +91,14 @@ class TestNotifications:
     
     @pytest.mark.slow
     def test_notification_delivery_performance(
-        self, client: TestClient, auth_headers, performance_tracker
+        self, client: TestClient, auth_headers, benchmark
     ):
         """Test notification retrieval performance"""
-        performance_tracker.start("get_notifications")
-        response = client.get("/notifications/", headers=auth_headers)
-        performance_tracker.end("get_notifications")
+        benchmark.group = "notifications"
+        response = benchmark(client.get, "/notifications/", headers=auth_headers)
         
         assert response.status_code == 200
-        # Should be fast (< 300ms)
-        performance_tracker.assert_within_threshold("get_notifications", 0.3)
+        # Should be fast (median < 300ms)
+        if benchmark.stats:
+            assert benchmark.stats.stats.median <= 0.3
 
@@ -3,6 +3,7 @@ Project Management Tests
 Test CRUD operations for projects
 """
 import pytest
+import httpx
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
@@ -11,46 +12,83 @@ from sqlalchemy.orm import Session
 class TestProjects:
     """Test project endpoints"""
     
-    def test_create_project(self, client: TestClient, auth_headers):
-        """Test creating a new project"""
+    async def test_project_lifecycle(self, async_client: httpx.AsyncClient, auth_headers):
+        """Test creating, updating and deleting a project through the API"""
         project_data = {
-            "title": "New Project",
+            "name": "New Project",
             "description": "Project description",
             "client_name": "Acme Corp",
             "industry": "Technology",
-            "region": "North America"
+            "region": "North America",
+            "project_type": "new"
         }
-        response = client.post(
-            "/projects/",
+        response = await async_client.post(
+            "/projects/create",
             json=project_data,
             headers=auth_headers
         )
         assert response.status_code == 201
         data = response.json()
-        assert data["title"] == project_data["title"]
+        assert data["name"] == project_data["name"]
         assert data["client_name"] == project_data["client_name"]
         assert "id" in data
+        project_id = data["id"]
+        
+        update_data = {
+            "name": "Updated Project Name",
+            "description": "Updated description"
+        }
+        response = await async_client.put(
+            f"/projects/{project_id}",
+            json=update_data,
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["name"] == update_data["name"]
+        assert data["description"] == update_data["description"]
+        
+        response = await async_client.delete(
+            f"/projects/{project_id}",
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        
+        # Verify project is deleted
+        response = await async_client.get(
+            f"/projects/{project_id}",
+            headers=auth_headers
+        )
+        assert response.status_code == 404
     
-    def test_create_project_no_auth(self, client: TestClient):
+    async def test_create_project_no_auth(self, async_client: httpx.AsyncClient):
         """Test creating project without authentication fails"""
         project_data = {
             "title": "New Project",
             "client_name": "Test Client"
         }
-        response = client.post("/projects/", json=project_data)
+        response = await async_client.post("/projects/", json=project_data)
         assert response.status_code == 401
     
-    def test_list_projects(self, client: TestClient, auth_headers, test_project):
-        """Test listing all projects"""
-        response = client.get("/projects/", headers=auth_headers)
+    async def test_list_projects_constant_queries(
+        self, async_client: httpx.AsyncClient, auth_headers, db: Session, test_user,
+        factories, query_counter
+    ):
+        """Test listing all projects without per-row queries (selectinload)"""
+        factories.ProjectFactory.create_batch(5, owner_id=test_user.id)
+        db.flush()
+        
+        query_counter.reset()
+        response = await async_client.get("/projects/list", headers=auth_headers)
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, list)
-        assert len(data) >= 1
+        assert len(data) >= 5
+        assert query_counter.count <= 3
     
-    def test_get_project_by_id(self, client: TestClient, auth_headers, test_project):
+    async def test_get_project_by_id(self, async_client: httpx.AsyncClient, auth_headers, test_project):
         """Test getting specific project by ID"""
-        response = client.get(
+        response = await async_client.get(
             f"/projects/{test_project.id}",
             headers=auth_headers
         )
@@ -59,29 +97,13 @@ class TestProjects:
         assert data["id"] == test_project.id
         assert data["title"] == test_project.title
     
-    def test_get_nonexistent_project(self, client: TestClient, auth_headers):
+    async def test_get_nonexistent_project(self, async_client: httpx.AsyncClient, auth_headers):
         """Test getting non-existent project returns 404"""
-        response = client.get("/projects/99999", headers=auth_headers)
+        response = await async_client.get("/projects/99999", headers=auth_headers)
         assert response.status_code == 404
     
-    def test_update_project(self, client: TestClient, auth_headers, test_project):
-        """Test updating a project"""
-        update_data = {
-            "title": "Updated Project Title",
-            "description": "Updated description"
-        }
-        response = client.put(
-            f"/projects/{test_project.id}",
-            json=update_data,
-            headers=auth_headers
-        )
-        assert response.status_code == 200
-        data = response.json()
-        assert data["title"] == update_data["title"]
-        assert data["description"] == update_data["description"]
-    
-    def test_update_project_ownership(
-        self, client: TestClient, auth_headers, db: Session, test_admin
+    async def test_update_project_ownership(
+        self, async_client: httpx.AsyncClient, auth_headers, db: Session, test_admin
     ):
         """Test users can only update their own projects"""
         from models import Project
@@ -98,49 +120,29 @@ class TestProjects:
         
         # Try to update as regular user (should fail)
         update_data = {"title": "Hacked Title"}
-        response = client.put(
+        response = await async_client.put(
             f"/projects/{admin_project.id}",
             json=update_data,
             headers=auth_headers
         )
         assert response.status_code in [403, 404]
     
-    def test_delete_project(self, client: TestClient, auth_headers, test_project):
-        """Test deleting a project"""
-        response = client.delete(
-            f"/projects/{test_project.id}",
-            headers=auth_headers
-        )
-        assert response.status_code == 204
-        
-        # Verify project is deleted
-        response = client.get(
-            f"/projects/{test_project.id}",
-            headers=auth_headers
-        )
-        assert response.status_code == 404
-    
-    def test_delete_nonexistent_project(self, client: TestClient, auth_headers):
+    async def test_delete_nonexistent_project(self, async_client: httpx.AsyncClient, auth_headers):
         """Test deleting non-existent project"""
-        response = client.delete("/projects/99999", headers=auth_headers)
+        response = await async_client.delete("/projects/99999", headers=auth_headers)
         assert response.status_code == 404
     
-    def test_project_pagination(self, client: TestClient, auth_headers, db: Session, test_user):
+    async def test_project_pagination(
+        self, async_client: httpx.AsyncClient, auth_headers, db: Session, test_user,
+        factories
+    ):
         """Test project list pagination"""
-        from models import Project
-        
-        # Create multiple projects
-        for i in range(15):
-            project = Project(
-                title=f"Project {i}",
-                client_name=f"Client {i}",
-                user_id=test_user.id
-            )
-            db.add(project)
+        # Create multiple projects in one batched INSERT
+        factories.ProjectFactory.create_batch(15, owner_id=test_user.id)
         db.commit()
         
         # Test with pagination params
-        response = client.get(
+        response = await async_client.get(
             "/projects/?skip=0&limit=10",
             headers=auth_headers
         )
@@ -148,9 +150,9 @@ class TestProjects:
         data = response.json()
         assert len(data) <= 10
     
-    def test_project_search(self, client: TestClient, auth_headers, test_project):
+    async def test_project_search(self, async_client: httpx.AsyncClient, auth_headers, test_project):
         """Test project search functionality"""
-        response = client.get(
+        response = await async_client.get(
             f"/projects/?search={test_project.title}",
             headers=auth_headers
         )
@@ -159,11 +161,11 @@ class TestProjects:
         assert len(data) >= 1
         assert any(p["id"] == test_project.id for p in data)
     
-    def test_project_filter_by_industry(
-        self, client: TestClient, auth_headers, test_project
+    async def test_project_filter_by_industry(
+        self, async_client: httpx.AsyncClient, auth_headers, test_project
     ):
         """Test filtering projects by industry"""
-        response = client.get(
+        response = await async_client.get(
             f"/projects/?industry={test_project.industry}",
             headers=auth_headers
         )
@@ -172,14 +174,14 @@ class TestProjects:
         assert all(p["industry"] == test_project.industry for p in data)
     
     def test_project_performance(
-        self, client: TestClient, auth_headers, performance_tracker
+        self, client: TestClient, auth_headers, benchmark
     ):
         """Test project list endpoint performance"""
-        performance_tracker.start("project_list")
-        response = client.get("/projects/", headers=auth_headers)
-        performance_tracker.end("project_list")
+        benchmark.group = "projects"
+        response = benchmark(client.get, "/projects/list", headers=auth_headers)
         
         assert response.status_code == 200
-        # Should respond within 1 second
-        performance_tracker.assert_within_threshold("project_list", 1.0)
+        # Should respond within 1 second (median)
+        if benchmark.stats:
+            assert benchmark.stats.stats.median <= 1.0
 
@@ -2,17 +2,24 @@
 Proposal Tests
 Test proposal creation, editing, and export
 """
+import asyncio
+import os
 import pytest
-from fastapi.testclient import TestClient
+import httpx
 from sqlalchemy.orm import Session
 
+# Caps how many export requests the slow tests keep in flight at once
+EXPORT_SEMAPHORE = asyncio.Semaphore(
+    int(os.getenv("NOVA_WS_MAX_CONCURRENT_HANDSHAKES", "10"))
+)
+
 
 @pytest.mark.api
 class TestProposal:
     """Test proposal endpoints"""
     
-    def test_create_proposal(
-        self, client: TestClient, auth_headers, test_project, db: Session
+    async def test_create_proposal(
+        self, async_client: httpx.AsyncClient, auth_headers, test_project, db: Session
     ):
         """Test creating a new proposal"""
         from models import Insights
@@ -39,7 +46,7 @@ class TestProposal:
             "pricing": "Pricing"
         }
         
-        response = client.post(
+        response = await async_client.post(
             "/proposal/",
             json=proposal_data,
             headers=auth_headers
@@ -50,15 +57,43 @@ class TestProposal:
         assert data["title"] == proposal_data["title"]
         assert "id" in data
     
-    def test_list_proposals(self, client: TestClient, auth_headers):
-        """Test listing all proposals"""
-        response = client.get("/proposal/", headers=auth_headers)
+    async def test_list_proposals_constant_queries(
+        self, async_client: httpx.AsyncClient, test_project, db: Session, query_counter
+    ):
+        """Test listing all proposals without per-row queries (selectinload)"""
+        from models import Proposal, User
+        from utils.security import create_access_token
+        
+        # The proposal list is the manager dashboard
+        manager = User(
+            email="manager@example.com",
+            full_name="Manager User",
+            hashed_password="unused",
+            is_active=True,
+            email_verified=True,
+            role="pre_sales_manager"
+        )
+        db.add(manager)
+        db.add_all([
+            Proposal(project_id=test_project.id, title=f"Proposal {i}")
+            for i in range(5)
+        ])
+        db.flush()
+        token = create_access_token(data={"sub": manager.email, "user_id": manager.id})
+        
+        query_counter.reset()
+        response = await async_client.get(
+            "/proposal/admin/dashboard",
+            headers={"Authorization": f"Bearer {token}"}
+        )
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, list)
+        assert len(data) >= 5
+        assert query_counter.count <= 3
     
-    def test_get_proposal_by_id(
-        self, client: TestClient, auth_headers, test_project, db: Session
+    async def test_get_proposal_by_id(
+        self, async_client: httpx.AsyncClient, auth_headers, test_project, db: Session
     ):
         """Test getting specific proposal"""
         from models import Proposal
@@ -69,10 +104,9 @@ class TestProposal:
             executive_summary="Summary"
         )
         db.add(proposal)
-        db.commit()
-        db.refresh(proposal)
+        db.flush()
         
-        response = client.get(
+        response = await async_client.get(
             f"/proposal/{proposal.id}",
             headers=auth_headers
         )
@@ -81,8 +115,8 @@ class TestProposal:
         data = response.json()
         assert data["id"] == proposal.id
     
-    def test_update_proposal(
-        self, client: TestClient, auth_headers, test_project, db: Session
+    async def test_update_proposal(
+        self, async_client: httpx.AsyncClient, auth_headers, test_project, db: Session
     ):
         """Test updating a proposal"""
         from models import Proposal
@@ -93,15 +127,14 @@ class TestProposal:
             executive_summary="Original Summary"
         )
         db.add(proposal)
-        db.commit()
-        db.refresh(proposal)
+        db.flush()
         
         update_data = {
             "title": "Updated Title",
             "executive_summary": "Updated Summary"
         }
         
-        response = client.put(
+        response = await async_client.put(
             f"/proposal/{proposal.id}",
             json=update_data,
             headers=auth_headers
@@ -111,8 +144,9 @@ class TestProposal:
         data = response.json()
         assert data["title"] == update_data["title"]
     
-    def test_regenerate_section(
-        self, client: TestClient, auth_headers, test_project, db: Session
+    async def test_regenerate_section(
+        self, async_client: httpx.AsyncClient, auth_headers, test_project, db: Session,
+        stub_gemini
     ):
         """Test regenerating a proposal section"""
         from models import Proposal
@@ -123,72 +157,61 @@ class TestProposal:
             executive_summary="Old Summary"
         )
         db.add(proposal)
-        db.commit()
-        db.refresh(proposal)
+        db.flush()
         
-        response = client.post(
+        response = await async_client.post(
             f"/proposal/{proposal.id}/regenerate/executive_summary",
             headers=auth_headers
         )
         
-        # May require Gemini API to be available
-        assert response.status_code in [200, 503]
+        assert response.status_code == 200
     
     @pytest.mark.slow
-    def test_export_pdf(
-        self, client: TestClient, auth_headers, test_project, db: Session
+    async def test_export_formats_concurrently(
+        self, async_client: httpx.AsyncClient, auth_headers, test_project, db: Session,
+        stub_proposal_export
     ):
-        """Test exporting proposal to PDF"""
+        """Test exporting proposals to PDF and PPTX with overlapping requests"""
         from models import Proposal
         
-        proposal = Proposal(
+        pdf_proposal = Proposal(
             project_id=test_project.id,
             title="Test Proposal",
-            executive_summary="Summary",
-            problem_statement="Problem",
-            proposed_solution="Solution"
+            sections=[
+                {"id": 1, "title": "Executive Summary", "content": "Summary"},
+                {"id": 2, "title": "Problem Statement", "content": "Problem"},
+                {"id": 3, "title": "Proposed Solution", "content": "Solution"}
+            ]
         )
-        db.add(proposal)
-        db.commit()
-        db.refresh(proposal)
-        
-        response = client.get(
-            f"/proposal/{proposal.id}/export/pdf",
-            headers=auth_headers
-        )
-        
-        # Should return PDF file or error
-        assert response.status_code in [200, 500]
-        if response.status_code == 200:
-            assert response.headers["content-type"] == "application/pdf"
-    
-    @pytest.mark.slow
-    def test_export_pptx(
-        self, client: TestClient, auth_headers, test_project, db: Session
-    ):
-        """Test exporting proposal to PPTX"""
-        from models import Proposal
-        
-        proposal = Proposal(
+        pptx_proposal = Proposal(
             project_id=test_project.id,
             title="Test Proposal",
-            executive_summary="Summary"
+            sections=[{"id": 1, "title": "Executive Summary", "content": "Summary"}]
         )
-        db.add(proposal)
-        db.commit()
-        db.refresh(proposal)
+        db.add_all([pdf_proposal, pptx_proposal])
+        db.flush()
         
-        response = client.get(
-            f"/proposal/{proposal.id}/export/pptx",
-            headers=auth_headers
+        async def fetch(url: str) -> httpx.Response:
+            async with EXPORT_SEMAPHORE:
+                return await async_client.get(url, headers=auth_headers)
+        
+        pdf_response, pptx_response = await asyncio.gather(
+            fetch(f"/proposal/export/{pdf_proposal.id}/pdf"),
+            fetch(f"/proposal/export/{pptx_proposal.id}/pptx"),
         )
         
-        assert response.status_code in [200, 500]
-        if response.status_code == 200:
-            assert "application" in response.headers["content-type"]
+        assert pdf_response.status_code == 200
+        assert pdf_response.headers["content-type"] == "application/pdf"
+        assert pdf_response.content == b"%PDF"
+        
+        assert pptx_response.status_code == 200
+        assert pptx_response.headers["content-type"] == (
+            "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+        )
+        assert pptx_response.content == b"PK\x03\x04"
     
-    def test_delete_proposal(
-        self, client: TestClient, auth_headers, test_project, db: Session
+    async def test_delete_proposal(
+        self, async_client: httpx.AsyncClient, auth_headers, test_project, db: Session
     ):
         """Test deleting a proposal"""
         from models import Proposal
@@ -198,10 +221,9 @@ class TestProposal:
             title="Test Proposal"
         )
         db.add(proposal)
-        db.commit()
-        db.refresh(proposal)
+        db.flush()
         
-        response = client.delete(
+        response = await async_client.delete(
             f"/proposal/{proposal.id}",
             headers=auth_headers
         )
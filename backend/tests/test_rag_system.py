@@ -3,6 +3,7 @@ RAG System Tests
 Test vector database, embeddings, and query functionality
 """
 import pytest
+import httpx
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
@@ -12,9 +13,9 @@ from sqlalchemy.orm import Session
 class TestRAGSystem:
     """Test RAG (Retrieval-Augmented Generation) system"""
     
-    def test_build_index(
-        self, client: TestClient, auth_headers, test_project,
-        sample_rfp_content, db: Session
+    async def test_build_index(
+        self, async_client: httpx.AsyncClient, auth_headers, test_project,
+        sample_rfp_content, db: Session, stub_rag
     ):
         """Test building vector index from document"""
         from models import RFPDocument
@@ -26,10 +27,9 @@ class TestRAGSystem:
             extracted_text=sample_rfp_content
         )
         db.add(rfp)
-        db.commit()
-        db.refresh(rfp)
+        db.flush()
         
-        response = client.post(
+        response = await async_client.post(
             "/rag/build-index",
             json={
                 "project_id": test_project.id,
@@ -38,11 +38,10 @@ class TestRAGSystem:
             headers=auth_headers
         )
         
-        # May require external services
-        assert response.status_code in [200, 201, 503]
+        assert response.status_code == 200
     
-    def test_query_rag(
-        self, client: TestClient, auth_headers, test_project
+    async def test_query_rag(
+        self, async_client: httpx.AsyncClient, auth_headers, test_project, stub_rag
     ):
         """Test querying RAG system"""
         query_data = {
@@ -50,17 +49,16 @@ class TestRAGSystem:
             "query": "What are the main requirements?"
         }
         
-        response = client.post(
+        response = await async_client.post(
             "/rag/query",
             json=query_data,
             headers=auth_headers
         )
         
-        # May need index to be built first
-        assert response.status_code in [200, 404, 503]
+        assert response.status_code == 200
     
-    def test_rag_chat(
-        self, client: TestClient, auth_headers, test_project
+    async def test_rag_chat(
+        self, async_client: httpx.AsyncClient, auth_headers, test_project, stub_rag
     ):
         """Test RAG chat functionality"""
         chat_data = {
@@ -68,21 +66,19 @@ class TestRAGSystem:
             "message": "Tell me about the technical requirements"
         }
         
-        response = client.post(
+        response = await async_client.post(
             "/rag/chat",
             json=chat_data,
             headers=auth_headers
         )
         
-        assert response.status_code in [200, 404, 503]
-        
-        if response.status_code == 200:
-            data = response.json()
-            assert "response" in data or "answer" in data
+        assert response.status_code == 200
+        data = response.json()
+        assert "response" in data or "answer" in data
     
-    def test_clear_cache(self, client: TestClient, auth_headers, test_project):
+    async def test_clear_cache(self, async_client: httpx.AsyncClient, auth_headers, test_project):
         """Test clearing RAG cache"""
-        response = client.delete(
+        response = await async_client.delete(
             f"/rag/cache/{test_project.id}",
             headers=auth_headers
         )
@@ -92,7 +88,7 @@ class TestRAGSystem:
     @pytest.mark.slow
     def test_query_performance(
         self, client: TestClient, auth_headers, test_project,
-        performance_tracker, db: Session, sample_rfp_content
+        benchmark, db: Session, sample_rfp_content
     ):
         """Test RAG query response time"""
         from models import RFPDocument
@@ -124,15 +120,12 @@ class TestRAGSystem:
             "query": "What is the budget?"
         }
         
-        performance_tracker.start("rag_query")
-        response = client.post(
-            "/rag/query",
-            json=query_data,
-            headers=auth_headers
+        benchmark.group = "rag"
+        response = benchmark(
+            client.post, "/rag/query", json=query_data, headers=auth_headers
         )
-        performance_tracker.end("rag_query")
         
-        if response.status_code == 200:
-            # Query should respond within 2 seconds
-            performance_tracker.assert_within_threshold("rag_query", 2.0)
+        if response.status_code == 200 and benchmark.stats:
+            # Query should respond within 2 seconds (median)
+            assert benchmark.stats.stats.median <= 2.0
 
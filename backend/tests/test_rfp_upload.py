@@ -97,7 +97,7 @@ class TestRFPUpload:
     
     @pytest.mark.slow
     def test_upload_large_file(
-        self, client: TestClient, auth_headers, test_project, performance_tracker
+        self, client: TestClient, auth_headers, test_project, benchmark
     ):
         """Test uploading large file (performance)"""
         # Create 5MB file
@@ -107,18 +107,19 @@ class TestRFPUpload:
         }
         data = {"project_id": test_project.id}
         
-        performance_tracker.start("large_upload")
-        response = client.post(
-            "/upload/rfp",
-            files=files,
-            data=data,
-            headers=auth_headers
+        # The upload consumes its file object, so time a single round
+        benchmark.group = "upload"
+        response = benchmark.pedantic(
+            client.post,
+            args=("/upload/rfp",),
+            kwargs={"files": files, "data": data, "headers": auth_headers},
+            rounds=1,
+            iterations=1
         )
-        performance_tracker.end("large_upload")
         
         # Should handle large files (within 5 seconds)
-        if response.status_code in [200, 201]:
-            performance_tracker.assert_within_threshold("large_upload", 5.0)
+        if response.status_code in [200, 201] and benchmark.stats:
+            assert benchmark.stats.stats.max <= 5.0
     
     def test_get_uploaded_documents(
         self, client: TestClient, auth_headers, test_project
@@ -15,7 +15,7 @@ class TestMultiAgentWorkflow:
     
     def test_execute_workflow(
         self, client: TestClient, auth_headers, test_project,
-        sample_rfp_content, db: Session, performance_tracker
+        sample_rfp_content, db: Session, benchmark
     ):
         """Test complete workflow execution"""
         from models import RFPDocument
@@ -35,13 +35,15 @@ class TestMultiAgentWorkflow:
             "rfp_document_id": rfp.id
         }
         
-        performance_tracker.start("workflow_execution")
-        response = client.post(
-            "/agents/execute-workflow",
-            json=workflow_data,
-            headers=auth_headers
+        # A workflow run is too slow to repeat; time exactly one round
+        benchmark.group = "workflows"
+        response = benchmark.pedantic(
+            client.post,
+            args=("/agents/execute-workflow",),
+            kwargs={"json": workflow_data, "headers": auth_headers},
+            rounds=1,
+            iterations=1
         )
-        performance_tracker.end("workflow_execution")
         
         # Workflow should complete or start processing
         assert response.status_code in [200, 202, 503]
@@ -50,7 +52,8 @@ class TestMultiAgentWorkflow:
             data = response.json()
             assert "insights" in data or "status" in data
             # Workflow should complete within 60 seconds
-            performance_tracker.assert_within_threshold("workflow_execution", 60.0)
+            if benchmark.stats:
+                assert benchmark.stats.stats.max <= 60.0
     
     def test_workflow_without_rfp(
         self, client: TestClient, auth_headers, test_project
@@ -1,10 +1,13 @@
 """
 Circuit breaker pattern for resilient service calls.
 """
-from typing import Callable, Any, Optional, Type, Tuple
+from typing import Callable, Any, Deque, Optional, Type, Tuple
+from collections import deque
 from functools import wraps
 from enum import Enum
+import inspect
 import time
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,15 +20,34 @@ class CircuitState(Enum):
     HALF_OPEN = "half_open"  # Testing if service recovered
 
 
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the protected function while a circuit is OPEN."""
+    __slots__ = ()
+
+
 class CircuitBreaker:
     """Circuit breaker for protecting services from cascading failures."""
     
+    __slots__ = (
+        "failure_threshold",
+        "recovery_timeout",
+        "expected_exception",
+        "name",
+        "failure_window",
+        "_failures",
+        "last_failure_time",
+        "state",
+        "_lock",
+        "_open_message",
+    )
+    
     def __init__(
         self,
         failure_threshold: int = 5,
         recovery_timeout: float = 60.0,
         expected_exception: Type[Exception] = Exception,
-        name: str = "default"
+        name: str = "default",
+        failure_window: float = 60.0
     ):
         """
         Initialize circuit breaker.
@@ -35,108 +57,145 @@ class CircuitBreaker:
             recovery_timeout: Seconds to wait before attempting recovery
             expected_exception: Exception type to catch
             name: Name for logging
+            failure_window: Seconds a failure keeps counting towards the threshold
         """
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.expected_exception = expected_exception
         self.name = name
+        self.failure_window = failure_window
         
-        self.failure_count = 0
+        # Monotonic timestamps of failures still inside the window
+        self._failures: Deque[float] = deque()
         self.last_failure_time: Optional[float] = None
         self.state = CircuitState.CLOSED
+        # Guards state transitions only; the CLOSED path never takes it
+        self._lock = threading.Lock()
+        # Formatted once; rejections happen on every call during an outage
+        self._open_message = (
+            f"Circuit breaker {self.name} is OPEN. "
+            f"Service unavailable. Retry after {self.recovery_timeout}s"
+        )
     
     def call(self, func: Callable, *args, **kwargs) -> Any:
         """Execute function with circuit breaker protection."""
-        if self.state == CircuitState.OPEN:
-            # Check if recovery timeout has passed
-            if self.last_failure_time and \
-               (time.time() - self.last_failure_time) >= self.recovery_timeout:
-                logger.info(f"Circuit breaker {self.name}: Attempting recovery (HALF_OPEN)")
-                self.state = CircuitState.HALF_OPEN
-            else:
-                raise Exception(
-                    f"Circuit breaker {self.name} is OPEN. "
-                    f"Service unavailable. Retry after {self.recovery_timeout}s"
-                )
-        
+        state = self.state
+        if state is not CircuitState.CLOSED:
+            state = self._before_call()
         try:
             result = func(*args, **kwargs)
-            
-            # Success - reset on success
-            if self.state == CircuitState.HALF_OPEN:
-                logger.info(f"Circuit breaker {self.name}: Service recovered (CLOSED)")
-                self.state = CircuitState.CLOSED
-                self.failure_count = 0
-                self.last_failure_time = None
-            
-            return result
-        
         except self.expected_exception as e:
-            # Don't count permanent errors or API key issues as circuit breaker failures
-            # These are permanent configuration issues, not transient failures
-            error_msg = str(e)
-            is_permanent_error = (
-                "PermanentError" in str(type(e)) or
-                "403" in error_msg or 
-                "Forbidden" in error_msg or 
-                ("API key" in error_msg and ("invalid" in error_msg.lower() or "expired" in error_msg.lower() or "leaked" in error_msg.lower()))
-            )
-            
-            if not is_permanent_error:
-                self._record_failure()
-            raise e
+            self._on_failure(state, e)
+            raise
+        except BaseException:
+            if state is CircuitState.HALF_OPEN:
+                self._release_probe()
+            raise
+        if state is CircuitState.HALF_OPEN:
+            self._on_success()
+        return result
     
     async def call_async(self, func: Callable, *args, **kwargs) -> Any:
         """Execute async function with circuit breaker protection."""
-        if self.state == CircuitState.OPEN:
-            # Check if recovery timeout has passed
-            if self.last_failure_time and \
-               (time.time() - self.last_failure_time) >= self.recovery_timeout:
-                logger.info(f"Circuit breaker {self.name}: Attempting recovery (HALF_OPEN)")
-                self.state = CircuitState.HALF_OPEN
-            else:
-                raise Exception(
-                    f"Circuit breaker {self.name} is OPEN. "
-                    f"Service unavailable. Retry after {self.recovery_timeout}s"
-                )
-        
+        state = self.state
+        if state is not CircuitState.CLOSED:
+            state = self._before_call()
         try:
             result = await func(*args, **kwargs)
-            
-            # Success - reset on success
-            if self.state == CircuitState.HALF_OPEN:
-                logger.info(f"Circuit breaker {self.name}: Service recovered (CLOSED)")
-                self.state = CircuitState.CLOSED
-                self.failure_count = 0
-                self.last_failure_time = None
-            
-            return result
-        
         except self.expected_exception as e:
-            # Don't count permanent errors or API key issues as circuit breaker failures
-            # These are permanent configuration issues, not transient failures
-            error_msg = str(e)
-            is_permanent_error = (
-                "PermanentError" in str(type(e)) or
-                "403" in error_msg or 
-                "Forbidden" in error_msg or 
-                ("API key" in error_msg and ("invalid" in error_msg.lower() or "expired" in error_msg.lower() or "leaked" in error_msg.lower()))
-            )
-            
-            if not is_permanent_error:
-                self._record_failure()
-            raise e
+            self._on_failure(state, e)
+            raise
+        except BaseException:
+            if state is CircuitState.HALF_OPEN:
+                self._release_probe()
+            raise
+        if state is CircuitState.HALF_OPEN:
+            self._on_success()
+        return result
+    
+    def _before_call(self) -> CircuitState:
+        """Reject the call or claim the HALF_OPEN probe; returns the state to call under."""
+        # Only one caller may probe a recovering service; the rest are rejected
+        if not self._lock.acquire(blocking=False):
+            raise CircuitOpenError(self._open_message)
+        try:
+            state = self.state
+            last_failure_time = self.last_failure_time
+            if state is CircuitState.OPEN and last_failure_time is not None and \
+               (time.monotonic() - last_failure_time) >= self.recovery_timeout:
+                logger.info("Circuit breaker %s: Attempting recovery (HALF_OPEN)", self.name)
+                self.state = state = CircuitState.HALF_OPEN
+            elif state is not CircuitState.CLOSED:
+                raise CircuitOpenError(self._open_message)
+            return state
+        finally:
+            self._lock.release()
+    
+    def _on_success(self):
+        """Close the circuit after a successful HALF_OPEN probe."""
+        with self._lock:
+            logger.info("Circuit breaker %s: Service recovered (CLOSED)", self.name)
+            self.state = CircuitState.CLOSED
+            self._failures.clear()
+            self.last_failure_time = None
+    
+    def _release_probe(self):
+        """Hand back a HALF_OPEN probe that ended without a verdict (cancelled or unexpected error)."""
+        with self._lock:
+            if self.state is CircuitState.HALF_OPEN:
+                # last_failure_time is already past the recovery timeout, so
+                # the next call claims a fresh probe instead of waiting again
+                self.state = CircuitState.OPEN
+    
+    def _on_failure(self, state: CircuitState, e: Exception):
+        """Count a transient failure; permanent errors don't trip the circuit."""
+        # Don't count permanent errors or API key issues as circuit breaker failures
+        # These are permanent configuration issues, not transient failures
+        error_msg = str(e)
+        is_permanent_error = (
+            "PermanentError" in str(type(e)) or
+            "403" in error_msg or 
+            "Forbidden" in error_msg or 
+            ("API key" in error_msg and ("invalid" in error_msg.lower() or "expired" in error_msg.lower() or "leaked" in error_msg.lower()))
+        )
+        
+        if not is_permanent_error:
+            self._record_failure()
+        elif state is CircuitState.HALF_OPEN:
+            # The service answered, so the probe must not stay claimed
+            self._on_success()
+    
+    @property
+    def failure_count(self) -> int:
+        """Number of failures recorded within the sliding window."""
+        return len(self._failures)
     
     def _record_failure(self):
         """Record a failure and update circuit state."""
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-        
-        if self.failure_count >= self.failure_threshold:
-            if self.state != CircuitState.OPEN:
+        if self.state is CircuitState.OPEN:
+            # Already open (a call that started before it opened): only push
+            # the recovery window out, without touching the window or lock
+            self.last_failure_time = time.monotonic()
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.last_failure_time = now
+            failures = self._failures
+            failures.append(now)
+            # Expire failures that fell out of the window
+            cutoff = now - self.failure_window
+            while failures[0] < cutoff:
+                failures.popleft()
+            
+            state = self.state
+            if state is CircuitState.HALF_OPEN:
+                # A failed probe re-opens even if older failures have expired
+                logger.error("Circuit breaker %s: Recovery probe failed, re-opening circuit", self.name)
+                self.state = CircuitState.OPEN
+            elif state is not CircuitState.OPEN and len(failures) >= self.failure_threshold:
                 logger.error(
-                    f"Circuit breaker {self.name}: Opening circuit "
-                    f"({self.failure_count} failures >= {self.failure_threshold})"
+                    "Circuit breaker %s: Opening circuit (%d failures >= %d)",
+                    self.name, len(failures), self.failure_threshold
                 )
                 self.state = CircuitState.OPEN
     
@@ -145,7 +204,7 @@ class CircuitBreaker:
         if self.state == CircuitState.OPEN:
             # Check if recovery timeout has passed
             if self.last_failure_time and \
-               (time.time() - self.last_failure_time) >= self.recovery_timeout:
+               (time.monotonic() - self.last_failure_time) >= self.recovery_timeout:
                 # Timeout passed, should transition to HALF_OPEN on next call
                 return False
             return True
@@ -155,32 +214,37 @@ class CircuitBreaker:
         """Get current circuit breaker state."""
         # Auto-transition from OPEN to HALF_OPEN if timeout passed
         if self.state == CircuitState.OPEN and self.last_failure_time:
-            if (time.time() - self.last_failure_time) >= self.recovery_timeout:
+            if (time.monotonic() - self.last_failure_time) >= self.recovery_timeout:
                 return CircuitState.HALF_OPEN
         return self.state
     
     def reset(self):
         """Manually reset circuit breaker."""
-        logger.info(f"Circuit breaker {self.name}: Manually reset")
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.state = CircuitState.CLOSED
+        logger.info("Circuit breaker %s: Manually reset", self.name)
+        with self._lock:
+            self._failures.clear()
+            self.last_failure_time = None
+            self.state = CircuitState.CLOSED
 
 
 def circuit_breaker(
     failure_threshold: int = 5,
     recovery_timeout: float = 60.0,
     expected_exception: Type[Exception] = Exception,
-    name: Optional[str] = None
+    name: Optional[str] = None,
+    failure_window: float = 60.0
 ):
     """
-    Circuit breaker decorator.
+    Circuit breaker decorator for sync and async functions.
+    
+    Whether to await the wrapped function is decided once, at decoration time.
     
     Args:
         failure_threshold: Number of failures before opening circuit
         recovery_timeout: Seconds to wait before attempting recovery
         expected_exception: Exception type to catch
         name: Name for circuit breaker (defaults to function name)
+        failure_window: Seconds a failure keeps counting towards the threshold
     """
     def decorator(func: Callable) -> Callable:
         cb_name = name or f"{func.__module__}.{func.__name__}"
@@ -188,9 +252,17 @@ def circuit_breaker(
             failure_threshold=failure_threshold,
             recovery_timeout=recovery_timeout,
             expected_exception=expected_exception,
-            name=cb_name
+            name=cb_name,
+            failure_window=failure_window
         )
         
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                return await breaker.call_async(func, *args, **kwargs)
+            
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             return breaker.call(func, *args, **kwargs)
@@ -199,34 +271,5 @@ def circuit_breaker(
     return decorator
 
 
-def async_circuit_breaker(
-    failure_threshold: int = 5,
-    recovery_timeout: float = 60.0,
-    expected_exception: Type[Exception] = Exception,
-    name: Optional[str] = None
-):
-    """
-    Async circuit breaker decorator.
-    
-    Args:
-        failure_threshold: Number of failures before opening circuit
-        recovery_timeout: Seconds to wait before attempting recovery
-        expected_exception: Exception type to catch
-        name: Name for circuit breaker (defaults to function name)
-    """
-    def decorator(func: Callable) -> Callable:
-        cb_name = name or f"{func.__module__}.{func.__name__}"
-        breaker = CircuitBreaker(
-            failure_threshold=failure_threshold,
-            recovery_timeout=recovery_timeout,
-            expected_exception=expected_exception,
-            name=cb_name
-        )
-        
-        @wraps(func)
-        async def wrapper(*args, **kwargs) -> Any:
-            return await breaker.call_async(func, *args, **kwargs)
-        
-        return wrapper
-    return decorator
-
+# Deprecated alias: circuit_breaker handles coroutine functions itself
+async_circuit_breaker = circuit_breaker
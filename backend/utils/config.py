@@ -1,5 +1,6 @@
+from functools import cached_property, lru_cache
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import FrozenSet, Tuple
 
 class Settings(BaseSettings):
     # API Settings
@@ -29,6 +30,9 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str = ""
     LLM_PROVIDER: str = "gemini"  # "gemini" or "openai"
     GEMINI_MODEL: str = "gemini-1.5-flash"  # Use stable model; gemini-2.0-flash may not be available
+    GEMINI_SEMANTIC_CACHE: bool = False  # Reuse answers to near-duplicate low-temperature prompts
+    GEMINI_SEMANTIC_CACHE_THRESHOLD: float = 0.92  # Minimum cosine similarity for a semantic cache hit
+    LLM_BATCH_ENABLED: bool = False  # Coalesce concurrent low-temperature Gemini prompts into one request
     
     # Vision and Multimodal Features
     USE_VISION_EXTRACTION: bool = True  # Use Gemini Vision for PDF parsing
@@ -120,10 +124,15 @@ class Settings(BaseSettings):
         """Get mail from email from MAIL_FROM or SMTP_FROM_EMAIL."""
         return self.MAIL_FROM or self.SMTP_FROM_EMAIL
     
-    @property
-    def allowed_extensions_list(self) -> List[str]:
-        """Parse allowed extensions from comma-separated string."""
-        return [ext.strip() for ext in self.ALLOWED_EXTENSIONS.split(",") if ext.strip()]
+    @cached_property
+    def allowed_extensions_list(self) -> Tuple[str, ...]:
+        """Parse allowed extensions from comma-separated string (once per instance)."""
+        return tuple(ext.strip() for ext in self.ALLOWED_EXTENSIONS.split(",") if ext.strip())
+    
+    @cached_property
+    def allowed_extensions_set(self) -> FrozenSet[str]:
+        """Lower-cased allowed extensions for O(1) membership checks."""
+        return frozenset(ext.lower() for ext in self.allowed_extensions_list)
     
     # CORS (comma-separated string in .env, or list in code)
     CORS_ORIGINS: str = "http://localhost:8080,http://localhost:5173,http://127.0.0.1:8080"
@@ -146,26 +155,36 @@ class Settings(BaseSettings):
     CACHE_TTL: int = 3600  # Default TTL in seconds (1 hour)
     EMBEDDING_CACHE_TTL: int = 86400  # Embedding cache TTL (24 hours)
     
-    @property
-    def cors_origins_list(self) -> List[str]:
-        """Parse CORS origins from comma-separated string."""
+    @cached_property
+    def cors_origins_list(self) -> Tuple[str, ...]:
+        """Parse CORS origins from comma-separated string (once per instance)."""
         if isinstance(self.CORS_ORIGINS, list):
-            return self.CORS_ORIGINS
-        return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
+            return tuple(self.CORS_ORIGINS)
+        return tuple(origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip())
     
-    @property
-    def allowed_hosts_list(self) -> List[str]:
-        """Parse allowed hosts from comma-separated string."""
+    @cached_property
+    def allowed_hosts_list(self) -> Tuple[str, ...]:
+        """Parse allowed hosts from comma-separated string (once per instance)."""
         if self.ALLOWED_HOSTS == "*":
-            return ["*"]
+            return ("*",)
         if isinstance(self.ALLOWED_HOSTS, list):
-            return self.ALLOWED_HOSTS
-        return [host.strip() for host in self.ALLOWED_HOSTS.split(",") if host.strip()]
+            return tuple(self.ALLOWED_HOSTS)
+        return tuple(host.strip() for host in self.ALLOWED_HOSTS.split(",") if host.strip())
     
     class Config:
         env_file = ".env"
         case_sensitive = True
         extra = "ignore"  # Ignore extra fields in .env that aren't defined
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide Settings, parsing the environment on first use.
+    
+    Routes can depend on this (``Depends(get_settings)``) so tests can swap
+    configuration through ``app.dependency_overrides``.
+    """
+    return Settings()
+
+# Back-compat alias for modules that import the instance directly
+settings = get_settings()
 
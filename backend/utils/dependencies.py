@@ -1,21 +1,35 @@
-from fastapi import Depends, HTTPException, status
+import logging
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from db.database import get_db
 from models.user import User
 from utils.security import decode_token
 
+logger = logging.getLogger(__name__)
+
 security = HTTPBearer()
 
-async def get_current_user(
+def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
-    """Get the current authenticated user from JWT token."""
-    token = credentials.credentials
+    """Get the current authenticated user from JWT token.
+    
+    The resolved user and decoded payload are kept on ``request.state`` so
+    any further resolution within the same request skips the decode and query.
+    """
+    cached_user = getattr(request.state, "current_user", None)
+    if cached_user is not None:
+        return cached_user
     
-    # Decode token
-    payload = decode_token(token)
+    # Decode token (once per request)
+    payload = getattr(request.state, "jwt_payload", None)
+    if payload is None:
+        payload = decode_token(credentials.credentials)
+        request.state.jwt_payload = payload
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,8 +52,16 @@ async def get_current_user(
             detail="Invalid token payload",
         )
     
-    # Get user from database
-    user = db.query(User).filter(User.email == user_email).first()
+    # Get user from database: tokens issued at login carry user_id, which is a
+    # primary-key lookup served from the identity map when already loaded.
+    # Legacy tokens without it fall back to the email lookup.
+    user_id = payload.get("user_id")
+    if user_id is not None:
+        user = db.get(User, user_id)
+        if user is not None and user.email != user_email:
+            user = None
+    else:
+        user = db.execute(select(User).where(User.email == user_email)).scalar_one_or_none()
     
     if not user:
         raise HTTPException(
@@ -54,10 +76,11 @@ async def get_current_user(
         )
     
     if not user.email_verified:
-        print(f"⚠️ User {user.email} (ID: {user.id}) attempted to access resource but email is not verified")
+        logger.warning("Unverified-email access attempt: user=%s id=%s", user.email, user.id)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Please verify your email before accessing this resource. Check your inbox for the verification link or contact support.",
         )
     
+    request.state.current_user = user
     return user
@@ -1,16 +1,91 @@
 """
 Email service for sending verification emails using Google SMTP.
 """
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import NamedTuple, Optional
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from fastapi_mail import ConnectionConfig
 from utils.config import settings
 from datetime import datetime
-import traceback
+import aiosmtplib
+import asyncio
+import html
+import re
+import smtplib
+import logging
+import logging.handlers
+import queue
+import time
 import sys
 
+logger = logging.getLogger("novaintel.email")
+
 # Email configuration for Google SMTP
 # Google SMTP settings: smtp.gmail.com, port 587, STARTTLS
 # Lazy initialization - only create config when email is actually configured
 _conf = None
+_pool = None
+_log_listener = None
+_validated = False
+
+# Background send queue, created by start_email_workers()
+EMAIL_QUEUE_SIZE = 1000
+_email_queue: Optional[asyncio.Queue] = None
+_workers: list = []
+EMAIL_BATCH_WINDOW = 0.2  # seconds
+EMAIL_BATCH_MAX_SIZE = 50
+
+# Markdown emphasis in proposal section previews
+_BOLD_RE = re.compile(r'\*\*(.+?)\*\*')
+_ITALIC_RE = re.compile(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)')
+
+# Connection reuse limits: Gmail closes connections that stay open too long or
+# carry too many messages, so rotate them before the server does.
+SMTP_POOL_SIZE = 5
+SMTP_MAX_MESSAGES_PER_CONNECTION = 100
+SMTP_MAX_CONNECTION_AGE = 60.0  # seconds
+
+_AUTH_TROUBLESHOOTING = f"""
+{'─'*60}
+🔧 TROUBLESHOOTING GUIDE:
+{'─'*60}
+This is a Google SMTP authentication error. Common causes:
+
+1. ❌ Using regular Gmail password instead of App Password
+   → Solution: Generate an App Password from Google Account settings
+   → Steps: https://myaccount.google.com/ → Security → 2-Step Verification → App passwords
+
+2. ❌ App Password has spaces or is incorrect
+   → Solution: Remove all spaces from the 16-character App Password
+   → Example: 'abcd efgh ijkl mnop' should be 'abcdefghijklmnop'
+
+3. ❌ 2-Step Verification not enabled
+   → Solution: Enable 2-Step Verification first, then generate App Password
+
+4. ❌ Wrong email address in MAIL_USERNAME
+   → Solution: Ensure MAIL_USERNAME matches the Gmail account with the App Password
+
+📝 Check your .env file:
+   MAIL_USERNAME=your-email@gmail.com
+   MAIL_PASSWORD=your-16-char-app-password (NO SPACES)
+   MAIL_FROM=your-email@gmail.com
+   MAIL_SERVER=smtp.gmail.com
+   MAIL_PORT=587
+   MAIL_TLS=True
+
+📚 Full setup guide: backend/GOOGLE_SMTP_SETUP.md
+{'─'*60}
+"""
+
+_AUTH_ERRORS = (aiosmtplib.SMTPAuthenticationError, smtplib.SMTPAuthenticationError)
+
+def _is_auth_error(error: Exception, error_type: str, error_msg: str) -> bool:
+    """Classify by exception type; only scan the message for unrecognized types."""
+    if isinstance(error, _AUTH_ERRORS):
+        return True
+    return "535" in error_msg or "BadCredentials" in error_msg or "Authentication" in error_type
 
 def _log_email_error(email_type: str, recipient: str, error: Exception, context: str = ""):
     """Log email sending errors with full details and helpful guidance."""
@@ -18,181 +93,497 @@ def _log_email_error(email_type: str, recipient: str, error: Exception, context:
     error_type = type(error).__name__
     error_msg = str(error)
     
-    print(f"\n{'='*60}", file=sys.stderr, flush=True)
-    print(f"[EMAIL ERROR] {timestamp}", file=sys.stderr, flush=True)
-    print(f"{'='*60}", file=sys.stderr, flush=True)
-    print(f"Email Type: {email_type}", file=sys.stderr, flush=True)
-    print(f"Recipient: {recipient}", file=sys.stderr, flush=True)
+    lines = [
+        f"\n{'='*60}",
+        f"[EMAIL ERROR] {timestamp}",
+        f"{'='*60}",
+        f"Email Type: {email_type}",
+        f"Recipient: {recipient}",
+    ]
     if context:
-        print(f"Context: {context}", file=sys.stderr, flush=True)
-    print(f"Error Type: {error_type}", file=sys.stderr, flush=True)
-    print(f"Error Message: {error_msg}", file=sys.stderr, flush=True)
+        lines.append(f"Context: {context}")
+    lines.append(f"Error Type: {error_type}")
+    lines.append(f"Error Message: {error_msg}")
     
     # Provide helpful guidance for common errors
-    if "535" in error_msg or "BadCredentials" in error_msg or "Authentication" in error_type:
-        print(f"\n{'─'*60}", file=sys.stderr, flush=True)
-        print("🔧 TROUBLESHOOTING GUIDE:", file=sys.stderr, flush=True)
-        print(f"{'─'*60}", file=sys.stderr, flush=True)
-        print("This is a Google SMTP authentication error. Common causes:", file=sys.stderr, flush=True)
-        print("", file=sys.stderr, flush=True)
-        print("1. ❌ Using regular Gmail password instead of App Password", file=sys.stderr, flush=True)
-        print("   → Solution: Generate an App Password from Google Account settings", file=sys.stderr, flush=True)
-        print("   → Steps: https://myaccount.google.com/ → Security → 2-Step Verification → App passwords", file=sys.stderr, flush=True)
-        print("", file=sys.stderr, flush=True)
-        print("2. ❌ App Password has spaces or is incorrect", file=sys.stderr, flush=True)
-        print("   → Solution: Remove all spaces from the 16-character App Password", file=sys.stderr, flush=True)
-        print("   → Example: 'abcd efgh ijkl mnop' should be 'abcdefghijklmnop'", file=sys.stderr, flush=True)
-        print("", file=sys.stderr, flush=True)
-        print("3. ❌ 2-Step Verification not enabled", file=sys.stderr, flush=True)
-        print("   → Solution: Enable 2-Step Verification first, then generate App Password", file=sys.stderr, flush=True)
-        print("", file=sys.stderr, flush=True)
-        print("4. ❌ Wrong email address in MAIL_USERNAME", file=sys.stderr, flush=True)
-        print("   → Solution: Ensure MAIL_USERNAME matches the Gmail account with the App Password", file=sys.stderr, flush=True)
-        print("", file=sys.stderr, flush=True)
-        print("📝 Check your .env file:", file=sys.stderr, flush=True)
-        print("   MAIL_USERNAME=your-email@gmail.com", file=sys.stderr, flush=True)
-        print("   MAIL_PASSWORD=your-16-char-app-password (NO SPACES)", file=sys.stderr, flush=True)
-        print("   MAIL_FROM=your-email@gmail.com", file=sys.stderr, flush=True)
-        print("   MAIL_SERVER=smtp.gmail.com", file=sys.stderr, flush=True)
-        print("   MAIL_PORT=587", file=sys.stderr, flush=True)
-        print("   MAIL_TLS=True", file=sys.stderr, flush=True)
-        print("", file=sys.stderr, flush=True)
-        print("📚 Full setup guide: backend/GOOGLE_SMTP_SETUP.md", file=sys.stderr, flush=True)
-        print(f"{'─'*60}", file=sys.stderr, flush=True)
+    if _is_auth_error(error, error_type, error_msg):
+        lines.append(_AUTH_TROUBLESHOOTING)
     
-    print(f"\nFull Traceback:", file=sys.stderr, flush=True)
-    traceback.print_exc(file=sys.stderr)
-    print(f"{'='*60}\n", file=sys.stderr, flush=True)
+    lines.append(f"\nFull Traceback:")
+    # One record per report so concurrent reports don't interleave
+    logger.error("\n".join(lines), exc_info=error)
+
+class _MailSettings(NamedTuple):
+    """Snapshot of the effective mail settings (MAIL_* or SMTP_* fallbacks)."""
+    server: str
+    port: int
+    username: str
+    password: str
+    mail_from: str
+    tls: bool
+    ssl: bool
+
+@lru_cache(maxsize=1)
+def _effective_config() -> _MailSettings:
+    """Resolve the mail settings once; settings are fixed for the process lifetime."""
+    return _MailSettings(
+        server=settings.mail_server,
+        port=settings.mail_port,
+        username=settings.mail_username,
+        password=settings.mail_password,
+        mail_from=settings.mail_from,
+        tls=settings.MAIL_TLS,
+        ssl=settings.MAIL_SSL,
+    )
 
 def validate_email_config():
     """Validate email configuration and provide helpful warnings."""
+    global _validated
+    cfg = _effective_config()
     issues = []
     
-    if not settings.mail_username:
+    if not cfg.username:
         issues.append("MAIL_USERNAME is not set")
-    elif "@gmail.com" not in settings.mail_username.lower() and settings.mail_server == "smtp.gmail.com":
-        issues.append(f"MAIL_USERNAME ({settings.mail_username}) doesn't look like a Gmail address")
+    elif "@gmail.com" not in cfg.username.lower() and cfg.server == "smtp.gmail.com":
+        issues.append(f"MAIL_USERNAME ({cfg.username}) doesn't look like a Gmail address")
     
-    if not settings.mail_password:
+    if not cfg.password:
         issues.append("MAIL_PASSWORD is not set")
-    elif len(settings.mail_password.replace(" ", "")) < 16:
+    elif len(cfg.password.replace(" ", "")) < 16:
         issues.append("MAIL_PASSWORD looks too short - Google App Passwords are 16 characters (remove spaces)")
-    elif " " in settings.mail_password:
+    elif " " in cfg.password:
         issues.append("MAIL_PASSWORD contains spaces - remove them (App Passwords should be 16 chars without spaces)")
     
-    if not settings.mail_from:
+    if not cfg.mail_from:
         issues.append("MAIL_FROM is not set")
-    elif settings.mail_from != settings.mail_username:
-        issues.append(f"MAIL_FROM ({settings.mail_from}) should match MAIL_USERNAME ({settings.mail_username})")
+    elif cfg.mail_from != cfg.username:
+        issues.append(f"MAIL_FROM ({cfg.mail_from}) should match MAIL_USERNAME ({cfg.username})")
     
-    if settings.mail_server == "smtp.gmail.com" and not settings.MAIL_TLS:
+    if cfg.server == "smtp.gmail.com" and not cfg.tls:
         issues.append("MAIL_TLS should be True for Gmail SMTP (port 587)")
     
     if issues:
-        print(f"\n{'⚠'*30}", file=sys.stderr, flush=True)
-        print("EMAIL CONFIGURATION WARNINGS:", file=sys.stderr, flush=True)
-        print(f"{'⚠'*30}", file=sys.stderr, flush=True)
-        for i, issue in enumerate(issues, 1):
-            print(f"  {i}. {issue}", file=sys.stderr, flush=True)
-        print(f"\n💡 Tip: See backend/GOOGLE_SMTP_SETUP.md for setup instructions", file=sys.stderr, flush=True)
-        print(f"{'⚠'*30}\n", file=sys.stderr, flush=True)
+        lines = [
+            f"\n{'⚠'*30}",
+            "EMAIL CONFIGURATION WARNINGS:",
+            f"{'⚠'*30}",
+        ]
+        lines.extend(f"  {i}. {issue}" for i, issue in enumerate(issues, 1))
+        lines.append(f"\n💡 Tip: See backend/GOOGLE_SMTP_SETUP.md for setup instructions")
+        lines.append(f"{'⚠'*30}\n")
+        logger.warning("\n".join(lines))
     
+    _validated = True
     return len(issues) == 0
 
 def get_email_config():
     """Get or create email configuration. Returns None if email is not configured."""
     global _conf
-    if _conf is None and settings.mail_from and settings.mail_username and settings.mail_password:
+    if _conf is None:
+        cfg = _effective_config()
+        if not (cfg.mail_from and cfg.username and cfg.password):
+            return None
         # Validate configuration on first use
-        validate_email_config()
+        if not _validated:
+            validate_email_config()
         
         _conf = ConnectionConfig(
-            MAIL_USERNAME=settings.mail_username,
-            MAIL_PASSWORD=settings.mail_password,
-            MAIL_FROM=settings.mail_from,
-            MAIL_PORT=settings.mail_port,
-            MAIL_SERVER=settings.mail_server,
+            MAIL_USERNAME=cfg.username,
+            MAIL_PASSWORD=cfg.password,
+            MAIL_FROM=cfg.mail_from,
+            MAIL_PORT=cfg.port,
+            MAIL_SERVER=cfg.server,
             MAIL_FROM_NAME="NovaIntel",
-            MAIL_STARTTLS=settings.MAIL_TLS,  # Use STARTTLS for Google SMTP
-            MAIL_SSL_TLS=settings.MAIL_SSL,  # SSL not used for port 587
+            MAIL_STARTTLS=cfg.tls,  # Use STARTTLS for Google SMTP
+            MAIL_SSL_TLS=cfg.ssl,  # SSL not used for port 587
             USE_CREDENTIALS=True,
             VALIDATE_CERTS=True
         )
     return _conf
 
-async def send_verification_email(email: str, verification_token: str):
-    """Send email verification link via Google SMTP."""
-    try:
-        conf = get_email_config()
-        if not conf:
-            print(f"[EMAIL WARNING] Email service not configured. Cannot send verification email to: {email}", file=sys.stderr, flush=True)
-            print(f"Verification link (manual): {settings.FRONTEND_URL}/verify-email?token={verification_token}", file=sys.stderr, flush=True)
-            return
-        
-        verification_url = f"{settings.FRONTEND_URL}/verify-email?token={verification_token}"
-        
-        message = MessageSchema(
-            subject="Verify your NovaIntel account",
-            recipients=[email],
-            body=f"""
-            <html>
-            <body>
-                <h2>Welcome to NovaIntel!</h2>
-                <p>Please verify your email address by clicking the link below:</p>
-                <p><a href="{verification_url}">Verify Email</a></p>
-                <p>Or copy this link: {verification_url}</p>
-                <p>This link will expire in 7 days.</p>
-            </body>
-            </html>
-            """,
-            subtype="html"
+class SmtpSession:
+    """
+    One authenticated SMTP connection, reused across sends.
+
+    Opening a connection costs a TCP connect, STARTTLS and AUTH, which
+    dominates the time to send one email. The connection is opened on first
+    use and kept open until SmtpPool rotates it out.
+    """
+
+    def __init__(self, conf: ConnectionConfig):
+        self.conf = conf
+        self.client: Optional[aiosmtplib.SMTP] = None
+        self.messages_sent = 0
+        self.created_at = 0.0
+
+    @property
+    def is_connected(self) -> bool:
+        return self.client is not None and self.client.is_connected
+
+    @property
+    def is_stale(self) -> bool:
+        """Gmail drops long-lived or heavily used connections; retire them first."""
+        return (
+            self.messages_sent >= SMTP_MAX_MESSAGES_PER_CONNECTION
+            or time.monotonic() - self.created_at > SMTP_MAX_CONNECTION_AGE
         )
-        
-        fm = FastMail(conf)
-        await fm.send_message(message)
-        print(f"[EMAIL SUCCESS] Verification email sent to: {email}", file=sys.stderr, flush=True)
+
+    async def connect(self):
+        """(Re)open the connection, dropping any previous client."""
+        await self.close()
+        conf = self.conf
+        client = aiosmtplib.SMTP(
+            hostname=conf.MAIL_SERVER,
+            port=conf.MAIL_PORT,
+            use_tls=conf.MAIL_SSL_TLS,
+            start_tls=conf.MAIL_STARTTLS,
+            validate_certs=conf.VALIDATE_CERTS,
+        )
+        await client.connect()
+        await client.login(conf.MAIL_USERNAME, conf.MAIL_PASSWORD.get_secret_value())
+        self.client = client
+        self.messages_sent = 0
+        self.created_at = time.monotonic()
+
+    async def close(self):
+        """Quit the current connection, ignoring errors from a dead socket."""
+        client, self.client = self.client, None
+        if client is not None and client.is_connected:
+            try:
+                await client.quit()
+            except (aiosmtplib.SMTPException, OSError):
+                client.close()
+
+    async def send(self, message: EmailMessage):
+        """Send a message, reconnecting once if the server dropped us."""
+        if not self.is_connected or self.is_stale:
+            await self.connect()
+        try:
+            await self.client.send_message(message)
+        except aiosmtplib.SMTPException as e:
+            if not _is_disconnect(e):
+                raise
+            await self.connect()
+            await self.client.send_message(message)
+        self.messages_sent += 1
+
+def _is_disconnect(error: Exception) -> bool:
+    """True for a dropped connection or a 421 'service closing' reply."""
+    if isinstance(error, aiosmtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, aiosmtplib.SMTPResponseException) and error.code == 421
+
+class SmtpPool:
+    """
+    A fixed set of SmtpSessions handed out one caller at a time.
+
+    An SMTP transaction cannot be interleaved on one socket, so each send
+    takes a session from the idle queue and returns it afterwards. Sessions
+    past the per-connection message or age cap are closed on release and
+    reconnect on their next use.
+    """
+
+    def __init__(self, conf: ConnectionConfig, size: int = SMTP_POOL_SIZE):
+        self._sessions = [SmtpSession(conf) for _ in range(size)]
+        self._idle: asyncio.Queue = asyncio.Queue(maxsize=size)
+        for session in self._sessions:
+            self._idle.put_nowait(session)
+
+    @asynccontextmanager
+    async def acquire(self):
+        session = await self._idle.get()
+        try:
+            yield session
+        finally:
+            try:
+                if session.is_connected and session.is_stale:
+                    await session.close()
+            finally:
+                self._idle.put_nowait(session)
+
+    async def close(self):
+        for session in self._sessions:
+            await session.close()
+
+def get_pool() -> Optional[SmtpPool]:
+    """Get the shared SMTP pool. Returns None if email is not configured."""
+    global _pool
+    if _pool is None:
+        conf = get_email_config()
+        if conf:
+            _pool = SmtpPool(conf)
+    return _pool
+
+async def close_pool():
+    """Close all pooled SMTP connections (called on application shutdown)."""
+    if _pool is not None:
+        await _pool.close()
+
+async def _deliver(job: dict, smtp: SmtpSession):
+    """Send one queued email over a pooled connection, logging the outcome."""
+    try:
+        await smtp.send(job["message"])
+        logger.info("[EMAIL SUCCESS] %s sent to: %s", job["email_type"], job["recipient"])
     except Exception as e:
-        _log_email_error("Verification Email", email, e, "User Registration")
+        _log_email_error(job["email_type"], job["recipient"], e, job["context"])
         raise
 
-async def send_password_reset_email(email: str, reset_token: str):
-    """Send password reset link via Google SMTP."""
-    try:
-        conf = get_email_config()
-        if not conf:
-            print(f"[EMAIL WARNING] Email service not configured. Cannot send password reset email to: {email}", file=sys.stderr, flush=True)
-            print(f"Reset link (manual): {settings.FRONTEND_URL}/reset-password?token={reset_token}", file=sys.stderr, flush=True)
-            return
+async def _enqueue(job: dict):
+    """
+    Hand an email to the background workers.
+
+    Returns as soon as the job is queued, so request handlers don't wait on
+    SMTP. The queue is bounded: when SMTP falls behind, callers wait here
+    instead of piling up unbounded work. Without running workers (scripts,
+    tests without the app lifespan) the email is sent inline.
+    """
+    if _workers:
+        await _email_queue.put(job)
+    else:
+        async with get_pool().acquire() as smtp:
+            await _deliver(job, smtp)
+
+async def _next_batch() -> list:
+    """
+    Wait for a job, then keep collecting for a short window.
+
+    A proposal submission queues one email per manager at once; sending them
+    together over one connection pays the pool handoff and any reconnect once
+    per batch instead of once per email.
+    """
+    batch = [await _email_queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + EMAIL_BATCH_WINDOW
+    while len(batch) < EMAIL_BATCH_MAX_SIZE:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(_email_queue.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+async def _worker():
+    while True:
+        batch = await _next_batch()
+        try:
+            async with get_pool().acquire() as smtp:
+                for job in batch:
+                    try:
+                        await _deliver(job, smtp)
+                    except Exception:
+                        pass  # Already logged by _deliver
+        finally:
+            for _ in batch:
+                _email_queue.task_done()
+
+def _start_log_listener():
+    """
+    Route this module's log records through a queue to a background thread.
+
+    Handlers write to stderr synchronously; going through a QueueHandler keeps
+    that write off the event loop the SMTP workers run on.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    log_queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+
+def _stop_log_listener():
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logger.removeHandler(handler)
+    logger.propagate = True
+    _log_listener = None
+
+def start_email_workers():
+    """Start the background email workers and log listener (called on application startup)."""
+    global _email_queue
+    if _workers:
+        return
+    _start_log_listener()
+    _email_queue = asyncio.Queue(maxsize=EMAIL_QUEUE_SIZE)
+    # One worker per pooled connection keeps every connection busy
+    for _ in range(SMTP_POOL_SIZE):
+        _workers.append(asyncio.create_task(_worker()))
+
+async def stop_email_workers(timeout: float = 10.0):
+    """Drain queued emails, stop the workers and close the SMTP pool."""
+    if _workers:
+        try:
+            await asyncio.wait_for(_email_queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("[EMAIL WARNING] %d queued emails dropped at shutdown", _email_queue.qsize())
+        for task in _workers:
+            task.cancel()
+        await asyncio.gather(*_workers, return_exceptions=True)
+        _workers.clear()
+    await close_pool()
+    _stop_log_listener()
+
+def _build_message(subject: str, recipient: str, html_body: str) -> EmailMessage:
+    """Build an HTML email from the configured sender."""
+    message = EmailMessage()
+    message["From"] = formataddr((_conf.MAIL_FROM_NAME, _conf.MAIL_FROM))
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content(html_body, subtype="html")
+    return message
+
+# Email bodies, filled with str.format_map at send time
+_VERIFICATION_EMAIL_TMPL = """
+<html>
+<body>
+    <h2>Welcome to NovaIntel!</h2>
+    <p>Please verify your email address by clicking the link below:</p>
+    <p><a href="{verification_url}">Verify Email</a></p>
+    <p>Or copy this link: {verification_url}</p>
+    <p>This link will expire in 7 days.</p>
+</body>
+</html>
+"""
+
+_PASSWORD_RESET_EMAIL_TMPL = """
+<html>
+<body>
+    <h2>Password Reset Request</h2>
+    <p>You requested to reset your password. Click the link below to set a new password:</p>
+    <p><a href="{reset_url}">Reset Password</a></p>
+    <p>Or copy this link: {reset_url}</p>
+    <p>This link will expire in 7 days.</p>
+    <p>If you didn't request this, please ignore this email.</p>
+</body>
+</html>
+"""
+
+_SUBMITTER_MESSAGE_TMPL = '<p style="margin: 8px 0;"><strong>Message from Submitter:</strong></p><p style="margin: 8px 0; padding: 10px; background-color: #ffffff; border-radius: 4px; font-style: italic;">{submitter_message}</p>'
+
+_SECTIONS_DIVIDER = '<hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">'
+
+# Stands in for the manager name while a bulk body is rendered; the NUL bytes
+# keep it from colliding with anything in the proposal content
+_MANAGER_NAME_SLOT = "\x00manager_name\x00"
+
+_PROPOSAL_EMAIL_TMPL = """
+<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <div style="max-width: 700px; margin: 0 auto; padding: 20px;">
+        <h2 style="color: #2563eb; border-bottom: 2px solid #2563eb; padding-bottom: 10px;">New Proposal Submitted for Review</h2>
         
-        reset_url = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
+        <p>Hello {manager_name},</p>
         
-        message = MessageSchema(
-            subject="Reset your NovaIntel password",
-            recipients=[email],
-            body=f"""
-            <html>
-            <body>
-                <h2>Password Reset Request</h2>
-                <p>You requested to reset your password. Click the link below to set a new password:</p>
-                <p><a href="{reset_url}">Reset Password</a></p>
-                <p>Or copy this link: {reset_url}</p>
-                <p>This link will expire in 7 days.</p>
-                <p>If you didn't request this, please ignore this email.</p>
-            </body>
-            </html>
-            """,
-            subtype="html"
-        )
+        <p>A new proposal has been submitted and requires your review:</p>
         
-        fm = FastMail(conf)
-        await fm.send_message(message)
-        print(f"[EMAIL SUCCESS] Password reset email sent to: {email}", file=sys.stderr, flush=True)
-    except Exception as e:
-        _log_email_error("Password Reset Email", email, e, "Password Reset Request")
-        raise
+        <div style="background-color: #f3f4f6; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #2563eb;">
+            <h3 style="margin-top: 0; color: #1e40af;">Proposal Details</h3>
+            <p style="margin: 8px 0;"><strong>Proposal Title:</strong> {proposal_title}</p>
+            <p style="margin: 8px 0;"><strong>Proposal ID:</strong> #{proposal_id}</p>
+            <p style="margin: 8px 0;"><strong>Template Type:</strong> {template_type}</p>
+            <p style="margin: 8px 0;"><strong>Submitted At:</strong> {submitted_at}</p>
+            
+            <hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">
+            
+            <h3 style="color: #1e40af;">Project Information</h3>
+            <p style="margin: 8px 0;"><strong>Project:</strong> {project_name}</p>
+            <p style="margin: 8px 0;"><strong>Client:</strong> {client_name}</p>
+            <p style="margin: 8px 0;"><strong>Industry:</strong> {industry}</p>
+            <p style="margin: 8px 0;"><strong>Region:</strong> {region}</p>
+            <p style="margin: 8px 0;"><strong>Project ID:</strong> #{project_id}</p>
+            
+            <hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">
+            
+            <h3 style="color: #1e40af;">Submitter Information</h3>
+            <p style="margin: 8px 0;"><strong>Submitted By:</strong> {submitter_name}</p>
+            {submitter_block}
+            
+            {sections_block}
+        </div>
+        
+        <p style="font-size: 16px; font-weight: 500;">Please review the proposal and provide your feedback.</p>
+        
+        <div style="margin: 30px 0; text-align: center;">
+            <a href="{admin_dashboard_url}" 
+               style="background-color: #2563eb; color: white; padding: 14px 28px; 
+                      text-decoration: none; border-radius: 6px; display: inline-block; 
+                      font-weight: bold; font-size: 16px;">
+                Review Proposal Now
+            </a>
+        </div>
+        
+        <p style="color: #6b7280; font-size: 14px; margin-top: 30px;">
+            Or <a href="{login_url}" style="color: #2563eb; text-decoration: underline;">login to your account</a> to access the admin dashboard.
+        </p>
+        
+        <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 30px 0;">
+        
+        <p style="color: #6b7280; font-size: 12px;">
+            This is an automated notification from NovaIntel. 
+            Please do not reply to this email.
+        </p>
+    </div>
+</body>
+</html>
+"""
 
-async def send_proposal_submission_email(
-    manager_email: str,
+async def send_verification_email(email: str, verification_token: str):
+    """Send email verification link via Google SMTP."""
+    pool = get_pool()
+    if not pool:
+        logger.warning("[EMAIL WARNING] Email service not configured. Cannot send verification email to: %s", email)
+        logger.warning("Verification link (manual): %s/verify-email?token=%s", settings.FRONTEND_URL, verification_token)
+        return
+    
+    verification_url = f"{settings.FRONTEND_URL}/verify-email?token={verification_token}"
+    
+    message = _build_message(
+        "Verify your NovaIntel account",
+        email,
+        _VERIFICATION_EMAIL_TMPL.format_map({"verification_url": verification_url})
+    )
+    
+    await _enqueue({
+        "email_type": "Verification Email",
+        "recipient": email,
+        "context": "User Registration",
+        "message": message,
+    })
+
+async def send_password_reset_email(email: str, reset_token: str):
+    """Send password reset link via Google SMTP."""
+    pool = get_pool()
+    if not pool:
+        logger.warning("[EMAIL WARNING] Email service not configured. Cannot send password reset email to: %s", email)
+        logger.warning("Reset link (manual): %s/reset-password?token=%s", settings.FRONTEND_URL, reset_token)
+        return
+    
+    reset_url = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
+    
+    message = _build_message(
+        "Reset your NovaIntel password",
+        email,
+        _PASSWORD_RESET_EMAIL_TMPL.format_map({"reset_url": reset_url})
+    )
+    
+    await _enqueue({
+        "email_type": "Password Reset Email",
+        "recipient": email,
+        "context": "Password Reset Request",
+        "message": message,
+    })
+
+def _render_proposal_email(
     manager_name: str,
     proposal_title: str,
     submitter_name: str,
@@ -206,141 +597,167 @@ async def send_proposal_submission_email(
     proposal_sections: list = None,
     template_type: str = None,
     submitted_at: str = None
-):
-    """Send email notification to admin/manager when a proposal is submitted for approval."""
-    conf = get_email_config()
-    if not conf:
-        print(f"⚠ Email not configured. Proposal submission notification for: {manager_email}")
-        print(f"   Proposal: {proposal_title} by {submitter_name}")
-        return
-    
+) -> str:
+    """Render the proposal submission email body."""
     login_url = f"{settings.FRONTEND_URL}/login"
     admin_dashboard_url = f"{settings.FRONTEND_URL}/admin/proposals"
-    proposal_url = f"{settings.FRONTEND_URL}/admin/proposals" if proposal_id else admin_dashboard_url
     
     # Format proposal sections preview
     sections_preview = ""
     if proposal_sections and len(proposal_sections) > 0:
-        sections_preview = "<div style='margin: 20px 0;'>"
-        sections_preview += f"<h3 style='color: #1e40af; margin-bottom: 15px;'>Proposal Preview ({len(proposal_sections)} sections)</h3>"
+        parts = ["<div style='margin: 20px 0;'>"]
+        parts.append(f"<h3 style='color: #1e40af; margin-bottom: 15px;'>Proposal Preview ({len(proposal_sections)} sections)</h3>")
         
         for idx, section in enumerate(proposal_sections[:10]):  # Show first 10 sections
             section_title = section.get('title', f'Section {idx + 1}') if isinstance(section, dict) else f'Section {idx + 1}'
             section_content = section.get('content', '') if isinstance(section, dict) else ''
             
-            # Truncate content for email preview (first 500 chars)
-            content_preview = section_content[:500] if section_content else "No content available"
-            if len(section_content) > 500:
-                content_preview += "..."
-            
-            # Escape HTML and convert markdown-like formatting to HTML for email
-            import html
-            content_html = html.escape(content_preview)
-            # Convert markdown to HTML
-            # Handle bold **text**
-            import re
-            content_html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', content_html)
-            # Handle italic *text* (but not **text**)
-            content_html = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', r'<em>\1</em>', content_html)
-            # Handle line breaks
-            content_html = content_html.replace('\n\n', '</p><p style="margin: 8px 0;">')
-            content_html = content_html.replace('\n', '<br>')
+            if not section_content:
+                # Nothing to escape or format
+                content_html = "No content available"
+            else:
+                # Truncate content for email preview (first 500 chars)
+                content_preview = section_content[:500]
+                if len(section_content) > 500:
+                    content_preview += "..."
+                
+                # Escape HTML and convert markdown-like formatting to HTML for email
+                content_html = html.escape(content_preview)
+                # Convert markdown to HTML (only when there is emphasis to convert)
+                if '*' in content_html:
+                    # Handle bold **text**
+                    content_html = _BOLD_RE.sub(r'<strong>\1</strong>', content_html)
+                    # Handle italic *text* (but not **text**)
+                    content_html = _ITALIC_RE.sub(r'<em>\1</em>', content_html)
+                # Handle line breaks
+                content_html = content_html.replace('\n\n', '</p><p style="margin: 8px 0;">')
+                content_html = content_html.replace('\n', '<br>')
             
-            sections_preview += f"""
+            parts.append(f"""
             <div style='background-color: #ffffff; border: 1px solid #e5e7eb; border-radius: 6px; padding: 15px; margin-bottom: 15px;'>
                 <h4 style='color: #1e40af; margin: 0 0 10px 0; font-size: 16px; font-weight: 600;'>{section_title}</h4>
                 <div style='color: #374151; font-size: 14px; line-height: 1.6;'>
                     <p style="margin: 8px 0;">{content_html}</p>
                 </div>
             </div>
-            """
+            """)
         
         if len(proposal_sections) > 10:
-            sections_preview += f"<p style='color: #6b7280; font-size: 14px; margin-top: 10px;'>... and {len(proposal_sections) - 10} more sections (view full proposal in dashboard)</p>"
+            parts.append(f"<p style='color: #6b7280; font-size: 14px; margin-top: 10px;'>... and {len(proposal_sections) - 10} more sections (view full proposal in dashboard)</p>")
         
-        sections_preview += "</div>"
+        parts.append("</div>")
+        sections_preview = "".join(parts)
     
     # Format submitted date
     submitted_date = submitted_at if submitted_at else "Just now"
     
-    message_body = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <div style="max-width: 700px; margin: 0 auto; padding: 20px;">
-            <h2 style="color: #2563eb; border-bottom: 2px solid #2563eb; padding-bottom: 10px;">New Proposal Submitted for Review</h2>
-            
-            <p>Hello {manager_name},</p>
-            
-            <p>A new proposal has been submitted and requires your review:</p>
-            
-            <div style="background-color: #f3f4f6; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #2563eb;">
-                <h3 style="margin-top: 0; color: #1e40af;">Proposal Details</h3>
-                <p style="margin: 8px 0;"><strong>Proposal Title:</strong> {proposal_title}</p>
-                <p style="margin: 8px 0;"><strong>Proposal ID:</strong> #{proposal_id if proposal_id else 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Template Type:</strong> {template_type.title() if template_type else 'Full'}</p>
-                <p style="margin: 8px 0;"><strong>Submitted At:</strong> {submitted_date}</p>
-                
-                <hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">
-                
-                <h3 style="color: #1e40af;">Project Information</h3>
-                <p style="margin: 8px 0;"><strong>Project:</strong> {project_name if project_name else 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Client:</strong> {client_name if client_name else 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Industry:</strong> {industry if industry else 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Region:</strong> {region if region else 'N/A'}</p>
-                <p style="margin: 8px 0;"><strong>Project ID:</strong> #{project_id if project_id else 'N/A'}</p>
-                
-                <hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">
-                
-                <h3 style="color: #1e40af;">Submitter Information</h3>
-                <p style="margin: 8px 0;"><strong>Submitted By:</strong> {submitter_name}</p>
-                {f'<p style="margin: 8px 0;"><strong>Message from Submitter:</strong></p><p style="margin: 8px 0; padding: 10px; background-color: #ffffff; border-radius: 4px; font-style: italic;">{submitter_message}</p>' if submitter_message else ''}
-                
-                {f'<hr style="border: none; border-top: 1px solid #d1d5db; margin: 15px 0;">{sections_preview}' if sections_preview else ''}
-            </div>
-            
-            <p style="font-size: 16px; font-weight: 500;">Please review the proposal and provide your feedback.</p>
-            
-            <div style="margin: 30px 0; text-align: center;">
-                <a href="{admin_dashboard_url}" 
-                   style="background-color: #2563eb; color: white; padding: 14px 28px; 
-                          text-decoration: none; border-radius: 6px; display: inline-block; 
-                          font-weight: bold; font-size: 16px;">
-                    Review Proposal Now
-                </a>
-            </div>
-            
-            <p style="color: #6b7280; font-size: 14px; margin-top: 30px;">
-                Or <a href="{login_url}" style="color: #2563eb; text-decoration: underline;">login to your account</a> to access the admin dashboard.
-            </p>
-            
-            <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 30px 0;">
-            
-            <p style="color: #6b7280; font-size: 12px;">
-                This is an automated notification from NovaIntel. 
-                Please do not reply to this email.
-            </p>
-        </div>
-    </body>
-    </html>
+    return _PROPOSAL_EMAIL_TMPL.format_map({
+        "manager_name": manager_name,
+        "proposal_title": proposal_title,
+        "proposal_id": proposal_id if proposal_id else 'N/A',
+        "template_type": template_type.title() if template_type else 'Full',
+        "submitted_at": submitted_date,
+        "project_name": project_name if project_name else 'N/A',
+        "client_name": client_name if client_name else 'N/A',
+        "industry": industry if industry else 'N/A',
+        "region": region if region else 'N/A',
+        "project_id": project_id if project_id else 'N/A',
+        "submitter_name": submitter_name,
+        "submitter_block": _SUBMITTER_MESSAGE_TMPL.format(submitter_message=submitter_message) if submitter_message else '',
+        "sections_block": _SECTIONS_DIVIDER + sections_preview if sections_preview else '',
+        "admin_dashboard_url": admin_dashboard_url,
+        "login_url": login_url,
+    })
+
+async def send_proposal_submission_email(
+    manager_email: str,
+    manager_name: str,
+    proposal_title: str,
+    submitter_name: str,
+    submitter_message: str = None,
+    proposal_id: int = None,
+    project_id: int = None,
+    project_name: str = None,
+    client_name: str = None,
+    industry: str = None,
+    region: str = None,
+    proposal_sections: list = None,
+    template_type: str = None,
+    submitted_at: str = None
+):
+    """Send email notification to admin/manager when a proposal is submitted for approval."""
+    await send_proposal_submission_email_bulk(
+        [(manager_email, manager_name)],
+        proposal_title=proposal_title,
+        submitter_name=submitter_name,
+        submitter_message=submitter_message,
+        proposal_id=proposal_id,
+        project_id=project_id,
+        project_name=project_name,
+        client_name=client_name,
+        industry=industry,
+        region=region,
+        proposal_sections=proposal_sections,
+        template_type=template_type,
+        submitted_at=submitted_at
+    )
+
+async def send_proposal_submission_email_bulk(
+    managers: list,
+    proposal_title: str,
+    submitter_name: str,
+    submitter_message: str = None,
+    proposal_id: int = None,
+    project_id: int = None,
+    project_name: str = None,
+    client_name: str = None,
+    industry: str = None,
+    region: str = None,
+    proposal_sections: list = None,
+    template_type: str = None,
+    submitted_at: str = None
+):
+    """
+    Notify several managers of the same proposal submission.
+
+    managers is a list of (email, name) tuples. The body is rendered once
+    with a placeholder for the manager name, which is the only per-recipient
+    field, and the placeholder is filled in for each recipient.
     """
+    pool = get_pool()
+    if not pool:
+        for manager_email, _ in managers:
+            logger.warning("⚠ Email not configured. Proposal submission notification for: %s", manager_email)
+        logger.warning("   Proposal: %s by %s", proposal_title, submitter_name)
+        return
     
-    message = MessageSchema(
-        subject=f"New Proposal Submitted: {proposal_title}",
-        recipients=[manager_email],
-        body=message_body,
-        subtype="html"
+    body_tmpl = _render_proposal_email(
+        _MANAGER_NAME_SLOT,
+        proposal_title=proposal_title,
+        submitter_name=submitter_name,
+        submitter_message=submitter_message,
+        proposal_id=proposal_id,
+        project_id=project_id,
+        project_name=project_name,
+        client_name=client_name,
+        industry=industry,
+        region=region,
+        proposal_sections=proposal_sections,
+        template_type=template_type,
+        submitted_at=submitted_at
     )
+    subject = f"New Proposal Submitted: {proposal_title}"
+    context = f"Proposal: {proposal_title}, Submitter: {submitter_name}, Proposal ID: {proposal_id}"
     
-    try:
-        fm = FastMail(conf)
-        await fm.send_message(message)
-        print(f"[EMAIL SUCCESS] Proposal submission email sent to: {manager_email} (Proposal: {proposal_title})", file=sys.stderr, flush=True)
-    except Exception as e:
-        _log_email_error(
-            "Proposal Submission Email", 
-            manager_email, 
-            e, 
-            f"Proposal: {proposal_title}, Submitter: {submitter_name}, Proposal ID: {proposal_id}"
+    for manager_email, manager_name in managers:
+        message = _build_message(
+            subject,
+            manager_email,
+            body_tmpl.replace(_MANAGER_NAME_SLOT, manager_name)
         )
-        raise
-
+        await _enqueue({
+            "email_type": "Proposal Submission Email",
+            "recipient": manager_email,
+            "context": context,
+            "message": message,
+        })
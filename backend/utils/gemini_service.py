@@ -1,29 +1,247 @@
 """
 Gemini LLM Service - Direct API integration with Google Gemini.
 """
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Tuple, Union
 import json
 import re
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from enum import IntEnum
+from functools import lru_cache
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import weakref
+import httpx
+import orjson
 import requests
-import base64
+from requests.adapters import HTTPAdapter
+import binascii
+import mmap
+import os
 from pathlib import Path
 from utils.config import settings
 from utils.retry import retry, async_retry, PermanentError
-from utils.circuit_breaker import circuit_breaker, async_circuit_breaker
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+_MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp"
+}
+
+# One breaker for every Gemini call, sync or async, so an outage seen on one
+# path stops the other from hammering the API too
+_gemini_breaker = CircuitBreaker(
+    failure_threshold=5,
+    recovery_timeout=60.0,
+    expected_exception=Exception,
+    name="gemini"
+)
+
+class GeminiAuthError(requests.RequestException):
+    """Raised by _handle_403 when Gemini rejects the API key or its permissions."""
+
+
+class ErrorKind(IntEnum):
+    """Outcome of the most recent Gemini call, as reported by get_service_status."""
+    OK = 0
+    CIRCUIT_OPEN = 1
+    AUTH_FAILED = 2
+    TRANSIENT = 3
+
+
+@lru_cache(maxsize=64)
+def _generation_config_items(
+    temperature: float,
+    max_tokens: Optional[int],
+    response_mime_type: Optional[str]
+) -> Tuple[Tuple[str, Any], ...]:
+    """generationConfig entries for a call signature; callers only see a few distinct ones."""
+    items = [("temperature", temperature)]
+    if max_tokens:
+        items.append(("maxOutputTokens", max_tokens))
+    if response_mime_type:
+        items.append(("response_mime_type", response_mime_type))
+    return tuple(items)
+
+
+# Chat roles to Gemini content roles; "system" becomes systemInstruction, others are dropped
+_ROLE_MAP = {"user": "user", "assistant": "model"}
+
+_JSON_OBJ_RE = re.compile(r'\{')
+_DECODER = json.JSONDecoder()
+
+def _strip_code_fence(text: str) -> str:
+    """Strip whitespace and a surrounding ```/```json fence with plain slicing."""
+    text = text.strip()
+    if text.startswith("```"):
+        newline = text.find("\n")
+        text = text[newline + 1:] if newline != -1 else text[3:]
+        if text.endswith("```"):
+            text = text[:-3]
+        text = text.strip()
+    return text
+
+# Responses to calls at or below this temperature are treated as deterministic and cached
+RESPONSE_CACHE_MAX_TEMPERATURE = 0.1
+RESPONSE_CACHE_SIZE = 2048
+RESPONSE_CACHE_TTL = 3600.0  # seconds
+# Maximum number of in-flight requests for batch_generate/abatch_generate
+BATCH_CONCURRENCY = 32
+# Thread pool size for reading and encoding several images of one request
+IMAGE_ENCODE_WORKERS = 8
+# Images at least this large are uploaded once via the Files API instead of
+# being base64-inlined into every request that uses them
+FILES_API_MIN_BYTES = 1024 * 1024
+FILE_URI_CACHE_SIZE = 256
+FILE_URI_TTL = 47 * 3600.0  # uploaded files expire after 48 hours
+
+SEMANTIC_CACHE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SEMANTIC_CACHE_SIZE = 1024
+
+
+class _SemanticCache:
+    """
+    Near-duplicate prompt cache backed by local MiniLM embeddings.
+    
+    Entries are bucketed by everything in the request except the prompt text
+    (endpoint, system instruction, generation config), so only the wording of
+    the prompt is compared. Embeddings are L2-normalized, making the cosine
+    similarity a single matrix-vector product per bucket.
+    """
+    
+    def __init__(self, threshold: float, max_entries: int = SEMANTIC_CACHE_SIZE):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._model = None
+        self._disabled = False
+        # bucket -> {"keys": [...], "vectors": ndarray, "responses": [...]}
+        self._buckets: Dict[str, Dict[str, Any]] = {}
+        # (bucket, entry id) in LRU order; used for eviction across buckets
+        self._lru: "OrderedDict[Tuple[str, int], None]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+    
+    def _encoder(self):
+        if self._model is None and not self._disabled:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(SEMANTIC_CACHE_MODEL)
+            except Exception as e:
+                logger.warning("Semantic cache disabled: %s", e)
+                self._disabled = True
+        return self._model
+    
+    @staticmethod
+    def split(url: str, payload: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Return (bucket, prompt_text), or None for requests with non-text parts."""
+        texts = []
+        for content in payload.get("contents", ()):
+            for part in content.get("parts", ()):
+                if "text" not in part:
+                    return None
+                texts.append(f"{content.get('role', '')}: {part['text']}")
+        if not texts:
+            return None
+        rest = {k: v for k, v in payload.items() if k != "contents"}
+        bucket = hashlib.sha256(
+            url.encode() + b"\n" + orjson.dumps(rest, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()
+        return bucket, "\n".join(texts)
+    
+    def embed(self, text: str):
+        model = self._encoder()
+        if model is None:
+            return None
+        return model.encode(text, normalize_embeddings=True)
+    
+    def get(self, bucket: str, vector) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entries = self._buckets.get(bucket)
+            if not entries or not entries["keys"]:
+                return None
+            scores = entries["vectors"] @ vector
+            best = int(scores.argmax())
+            if scores[best] < self.threshold:
+                return None
+            self._lru.move_to_end((bucket, entries["keys"][best]))
+            return entries["responses"][best]
+    
+    def put(self, bucket: str, vector, response_data: Dict[str, Any]):
+        import numpy as np
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            entries = self._buckets.setdefault(
+                bucket, {"keys": [], "vectors": np.empty((0, vector.shape[0]), dtype=vector.dtype), "responses": []}
+            )
+            entries["keys"].append(entry_id)
+            entries["vectors"] = np.vstack([entries["vectors"], vector])
+            entries["responses"].append(response_data)
+            self._lru[(bucket, entry_id)] = None
+            if len(self._lru) > self.max_entries:
+                self._evict(*self._lru.popitem(last=False)[0])
+    
+    def _evict(self, bucket: str, entry_id: int):
+        import numpy as np
+        entries = self._buckets[bucket]
+        i = entries["keys"].index(entry_id)
+        del entries["keys"][i]
+        del entries["responses"][i]
+        entries["vectors"] = np.delete(entries["vectors"], i, axis=0)
+        if not entries["keys"]:
+            del self._buckets[bucket]
 
 class GeminiService:
     """Service for interacting with Google Gemini API directly with retry and circuit breaker."""
     
     def __init__(self):
         self.api_key = settings.GEMINI_API_KEY
+        self._is_available = bool(self.api_key)
         self.model = settings.GEMINI_MODEL
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
-        self._circuit_breaker = None  # Will be set by decorator
-        self._last_error = None
+        self._generate_url = f"{self.base_url}/models/{self.model}:generateContent"
+        self._circuit_breaker = _gemini_breaker
+        self._last_error_kind = ErrorKind.OK
+        self._last_error_msg: Optional[str] = None  # for display when the kind is TRANSIENT
+        # key -> (expires_at, response_data), kept in LRU order
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._cache_max = RESPONSE_CACHE_SIZE
+        self._cache_ttl = RESPONSE_CACHE_TTL
+        self.hits = 0
+        self.misses = 0
+        self._semantic_cache = (
+            _SemanticCache(settings.GEMINI_SEMANTIC_CACHE_THRESHOLD)
+            if settings.GEMINI_SEMANTIC_CACHE else None
+        )
+        self._cache_lock = threading.Lock()
+        # One async client per event loop, created on first async call
+        self._aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        
+        # Files API upload URIs: sha256(image) -> (expires_at, file_uri), LRU order
+        self._upload_url = "https://generativelanguage.googleapis.com/upload/v1beta/files"
+        self._file_uris: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._file_uri_lock = threading.Lock()
+        
+        # Persistent session so TCP+TLS connections to the API are reused across calls.
+        # Retries are handled by the @retry decorator, not urllib3.
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=0))
+        self._session.headers.update({"Content-Type": "application/json"})
+        if self.api_key:
+            # Header rather than ?key= so the key stays out of URLs and request logs
+            self._session.headers["x-goog-api-key"] = self.api_key
         
     def is_available(self) -> bool:
-        """Check if Gemini service is available."""
-        return bool(self.api_key)
+        """Check if Gemini service is available (resolved once at construction)."""
+        return self._is_available
     
     def get_service_status(self) -> Dict[str, Any]:
         """
@@ -42,154 +260,377 @@ class GeminiService:
             status["error"] = "Gemini API key not configured"
             return status
         
-        # Check for recent errors that might indicate circuit breaker state
-        if self._last_error:
-            error_str = self._last_error
-            if "Circuit breaker" in error_str and "OPEN" in error_str:
-                status["circuit_breaker_open"] = True
-                status["error"] = "Service temporarily unavailable. Please try again in a moment."
-            elif "403" in error_str or "Forbidden" in error_str:
-                status["error"] = "API key authentication failed. Please check your GEMINI_API_KEY configuration."
-            else:
-                status["error"] = self._last_error
+        # Read the shared breaker directly rather than inferring it from the last error
+        if self._circuit_breaker.is_open():
+            status["circuit_breaker_open"] = True
+            status["error"] = "Service temporarily unavailable. Please try again in a moment."
+        elif self._last_error_kind is ErrorKind.AUTH_FAILED:
+            status["error"] = "API key authentication failed. Please check your GEMINI_API_KEY configuration."
+        elif self._last_error_kind is not ErrorKind.OK:
+            status["error"] = self._last_error_msg
             
         return status
     
+    @staticmethod
+    def _cache_key(url: str, payload: Dict[str, Any]) -> str:
+        """SHA-256 of the endpoint and canonicalized payload (images are inline base64)."""
+        canonical = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(url.encode() + b"\n" + canonical).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._cache[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def _cache_put(self, key: str, response_data: Dict[str, Any]):
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic() + self._cache_ttl, response_data)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self._cache_max:
+                self._cache.popitem(last=False)
+    
+    def _request(self, url: str, payload: Dict[str, Any], temperature: float) -> Dict[str, Any]:
+        """
+        Make a request, serving near-zero-temperature calls from an LRU cache.
+        
+        Identical deterministic prompts (extraction pipelines) then cost one
+        API round-trip. Only successful responses are cached.
+        """
+        if temperature > RESPONSE_CACHE_MAX_TEMPERATURE:
+            return self._make_request(url, payload)
+        
+        key = self._cache_key(url, payload)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        semantic = self._semantic_lookup(url, payload)
+        if semantic is not None and semantic[2] is not None:
+            self._cache_put(key, semantic[2])
+            return semantic[2]
+        
+        response_data = self._make_request(url, payload)
+        self._cache_put(key, response_data)
+        self._semantic_store(semantic, response_data)
+        return response_data
+    
+    async def _arequest(self, url: str, payload: Dict[str, Any], temperature: float) -> Dict[str, Any]:
+        """Async counterpart of _request, sharing the same response cache."""
+        if temperature > RESPONSE_CACHE_MAX_TEMPERATURE:
+            return await self._amake_request(url, payload)
+        
+        key = self._cache_key(url, payload)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        semantic = None
+        if self._semantic_cache is not None:
+            semantic = await asyncio.to_thread(self._semantic_lookup, url, payload)
+        if semantic is not None and semantic[2] is not None:
+            self._cache_put(key, semantic[2])
+            return semantic[2]
+        
+        response_data = await self._amake_request(url, payload)
+        self._cache_put(key, response_data)
+        self._semantic_store(semantic, response_data)
+        return response_data
+    
+    def _semantic_lookup(self, url: str, payload: Dict[str, Any]):
+        """
+        Embed the prompt and look it up in the semantic cache.
+        
+        Returns (bucket, vector, cached_response_or_None), or None when the
+        semantic cache is off or the request cannot be embedded.
+        """
+        if self._semantic_cache is None:
+            return None
+        split = self._semantic_cache.split(url, payload)
+        if split is None:
+            return None
+        bucket, text = split
+        vector = self._semantic_cache.embed(text)
+        if vector is None:
+            return None
+        return bucket, vector, self._semantic_cache.get(bucket, vector)
+    
+    def _semantic_store(self, semantic, response_data: Dict[str, Any]):
+        if semantic is not None:
+            self._semantic_cache.put(semantic[0], semantic[1], response_data)
+    
     def _make_request(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Make HTTP request with retry and circuit breaker."""
         return self._make_request_with_cb(url, payload)
     
     @retry(max_attempts=3, backoff="exponential", base_delay=1.0, exceptions=(requests.RequestException,))
-    @circuit_breaker(failure_threshold=5, recovery_timeout=60.0, expected_exception=Exception)
     def _make_request_with_cb(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Make HTTP request with retry and circuit breaker (internal)."""
-        headers = {
-            "Content-Type": "application/json"
-        }
+        return _gemini_breaker.call(self._post, url, payload)
+    
+    def _post(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Single HTTP attempt over the pooled session."""
+        # orjson emits bytes directly; image payloads can be megabytes of base64
+        response = self._session.post(url, data=orjson.dumps(payload), timeout=30)
+        return self._check_response(response)
+    
+    def _get_aclient(self) -> httpx.AsyncClient:
+        """
+        Get the HTTP/2 client for the running event loop.
         
-        if self.api_key:
-            url = f"{url}?key={self.api_key}"
+        Concurrent async calls multiplex over one connection. Connections are
+        bound to the loop that opened them, so each loop gets its own client.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._aclients.get(loop)
+        if client is None:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["x-goog-api-key"] = self.api_key
+            client = httpx.AsyncClient(
+                http2=True,
+                timeout=30.0,
+                headers=headers,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+            )
+            self._aclients[loop] = client
+        return client
+    
+    async def aclose(self):
+        """Close the async client for the running event loop."""
+        client = self._aclients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+    
+    async def _amake_request(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Async HTTP request with retry and circuit breaker."""
+        return await self._amake_request_with_cb(url, payload)
+    
+    @async_retry(max_attempts=3, backoff="exponential", base_delay=1.0, exceptions=(requests.RequestException,))
+    async def _amake_request_with_cb(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Async HTTP request with retry and circuit breaker (internal)."""
+        return await _gemini_breaker.call_async(self._apost, url, payload)
+    
+    async def _apost(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Single HTTP/2 attempt over the per-loop async client."""
+        # httpx errors are re-raised as requests exceptions so retries and the
+        # callers' error handling treat both transports the same way
+        try:
+            response = await self._get_aclient().post(url, content=orjson.dumps(payload))
+        except httpx.HTTPError as e:
+            raise requests.RequestException(str(e)) from e
         
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-        except requests.RequestException as e:
-            self._last_error = str(e)
-            raise
-        
-        # Handle 403 Forbidden errors (API key issues)
-        if response.status_code == 403:
-            error_message = "Forbidden: API key may be invalid or expired"
-            try:
-                error_data = response.json()
-                error_obj = error_data.get("error", {})
-                error_message = error_obj.get("message", error_message)
-                
-                # Check for API key issues
-                error_details = error_obj.get("details", [])
-                is_api_key_error = any(
-                    detail.get("reason") == "API_KEY_INVALID" or 
-                    "API key" in error_message or
-                    "API_KEY" in str(detail) or
-                    "permission" in error_message.lower() or
-                    "forbidden" in error_message.lower()
+            return self._check_response(response)
+        except httpx.HTTPStatusError as e:
+            raise requests.HTTPError(str(e)) from e
+    
+    def _check_response(self, response) -> Dict[str, Any]:
+        """Turn a requests or httpx response into parsed JSON or a classified error."""
+        # Success is the common case - parse it before any error classification
+        if 200 <= response.status_code < 300:
+            return self._parse_json(response)
+        return self._handle_error_response(response)
+    
+    @staticmethod
+    def _parse_json(response) -> Dict[str, Any]:
+        """Parse a response body; a truncated or malformed body is a transient request error."""
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError as e:
+            raise requests.RequestException(f"Invalid JSON in Gemini response: {e}") from e
+    
+    def _handle_error_response(self, response) -> Dict[str, Any]:
+        """Raise the classified error for a non-2xx response."""
+        handler = self._ERROR_HANDLERS.get(response.status_code)
+        if handler is not None:
+            handler(self, response)
+        
+        response.raise_for_status()
+        # 1xx/3xx are not raised by raise_for_status; parse them as before
+        return self._parse_json(response)
+    
+    def _handle_403(self, response):
+        """Handle 403 Forbidden errors (API key issues)."""
+        error_message = "Forbidden: API key may be invalid or expired"
+        try:
+            error_data = response.json()
+            error_obj = error_data.get("error", {})
+            error_message = error_obj.get("message", error_message)
+            lowered = error_message.lower()
+            
+            # Check for API key issues (message checks only count when details are present)
+            error_details = error_obj.get("details", [])
+            is_api_key_error = bool(error_details) and (
+                "API key" in error_message or
+                "permission" in lowered or
+                "forbidden" in lowered or
+                any(
+                    detail.get("reason") == "API_KEY_INVALID" or "API_KEY" in str(detail)
                     for detail in error_details
                 )
-                
+            )
+            
+            if is_api_key_error:
                 # Check for permanent API key errors (leaked, invalid, expired)
                 is_permanent_error = (
-                    "leaked" in error_message.lower() or
-                    "reported as leaked" in error_message.lower() or
-                    ("invalid" in error_message.lower() and "api key" in error_message.lower()) or
-                    ("expired" in error_message.lower() and "api key" in error_message.lower())
+                    "leaked" in lowered or
+                    ("api key" in lowered and ("invalid" in lowered or "expired" in lowered))
                 )
-                
-                if is_api_key_error:
-                    if is_permanent_error:
-                        # Raise PermanentError to skip retries
-                        raise PermanentError(
-                            f"403 Forbidden: {error_message}. "
-                            f"Please check your GEMINI_API_KEY in the .env file. "
-                            f"The API key may be invalid, expired, or reported as leaked. "
-                            f"You need to generate a new API key from Google AI Studio."
-                        )
-                    else:
-                        # Don't let 403 errors trigger circuit breaker failures
-                        # These are permanent configuration issues, not transient failures
-                        raise requests.RequestException(
-                            f"403 Forbidden: {error_message}. "
-                            f"Please check your GEMINI_API_KEY in the .env file. "
-                            f"The API key may be invalid, expired, or not have the required permissions."
-                        )
-            except PermanentError:
-                # Re-raise permanent errors
-                raise
-            except (ValueError, KeyError, json.JSONDecodeError):
-                pass
-            
-            # Generic 403 error - check if it's a permanent error
-            if "leaked" in error_message.lower() or "reported as leaked" in error_message.lower():
-                raise PermanentError(
+                if is_permanent_error:
+                    # Raise PermanentError to skip retries
+                    raise PermanentError(
+                        f"403 Forbidden: {error_message}. "
+                        f"Please check your GEMINI_API_KEY in the .env file. "
+                        f"The API key may be invalid, expired, or reported as leaked. "
+                        f"You need to generate a new API key from Google AI Studio."
+                    )
+                # Don't let 403 errors trigger circuit breaker failures
+                # These are permanent configuration issues, not transient failures
+                raise GeminiAuthError(
                     f"403 Forbidden: {error_message}. "
-                    f"Your API key was reported as leaked. Please generate a new API key from Google AI Studio."
+                    f"Please check your GEMINI_API_KEY in the .env file. "
+                    f"The API key may be invalid, expired, or not have the required permissions."
                 )
-            
-            # Generic 403 error
-            raise requests.RequestException(
+        except (ValueError, KeyError, json.JSONDecodeError):
+            pass
+        
+        # Generic 403 error - check if it's a permanent error
+        if "leaked" in error_message.lower():
+            raise PermanentError(
                 f"403 Forbidden: {error_message}. "
-                f"Please verify your GEMINI_API_KEY has the correct permissions."
+                f"Your API key was reported as leaked. Please generate a new API key from Google AI Studio."
             )
         
-        # Better error handling for 400 errors
-        if response.status_code == 400:
-            try:
-                error_data = response.json()
-                error_obj = error_data.get("error", {})
-                error_message = error_obj.get("message", "Bad Request")
-                error_code = error_obj.get("code", 400)
-                
-                # Check for API key issues
-                error_details = error_obj.get("details", [])
-                is_api_key_error = any(
-                    detail.get("reason") == "API_KEY_INVALID" or 
-                    "API key" in error_message or
-                    "API_KEY" in str(detail)
-                    for detail in error_details
-                )
-                
-                if is_api_key_error:
-                    raise requests.RequestException(
-                        f"400 Bad Request: {error_message}. "
-                        f"Please check your GEMINI_API_KEY in the .env file and ensure it's valid and not expired."
-                    )
-                
-                # Check for model-related errors
-                is_model_error = (
-                    "model" in error_message.lower() or
-                    "invalid" in error_message.lower() and "model" in str(error_data).lower()
-                )
-                
-                if is_model_error:
-                    raise requests.RequestException(
-                        f"400 Bad Request: {error_message}. "
-                        f"Model '{self.model}' may not be available. "
-                        f"Try 'gemini-1.5-flash' or 'gemini-1.5-pro' instead."
-                    )
-                
-                # Generic 400 error
-                print(f"[Gemini API] 400 Error Details: {error_obj}")
-                raise requests.RequestException(
-                    f"400 Bad Request: {error_message}. "
-                    f"Full error: {error_data}"
-                )
-            except (ValueError, KeyError, json.JSONDecodeError):
-                error_text = response.text[:500] if response.text else "No error details"
-                raise requests.RequestException(
-                    f"400 Bad Request: Invalid request format. "
-                    f"Response: {error_text}"
-                )
+        # Generic 403 error
+        raise GeminiAuthError(
+            f"403 Forbidden: {error_message}. "
+            f"Please verify your GEMINI_API_KEY has the correct permissions."
+        )
+    
+    def _handle_400(self, response):
+        """Handle 400 Bad Request errors (API key, model, or payload problems)."""
+        try:
+            error_data = response.json()
+            error_obj = error_data.get("error", {})
+            error_message = error_obj.get("message", "Bad Request")
+        except (ValueError, KeyError, json.JSONDecodeError):
+            error_text = response.text[:500] or "No error details"
+            raise requests.RequestException(
+                f"400 Bad Request: Invalid request format. "
+                f"Response: {error_text}"
+            )
         
-        response.raise_for_status()
-        return response.json()
+        # Check for API key issues
+        error_details = error_obj.get("details", [])
+        is_api_key_error = bool(error_details) and (
+            "API key" in error_message or
+            any(
+                detail.get("reason") == "API_KEY_INVALID" or "API_KEY" in str(detail)
+                for detail in error_details
+            )
+        )
+        
+        if is_api_key_error:
+            raise requests.RequestException(
+                f"400 Bad Request: {error_message}. "
+                f"Please check your GEMINI_API_KEY in the .env file and ensure it's valid and not expired."
+            )
+        
+        # Check for model-related errors
+        lowered = error_message.lower()
+        is_model_error = (
+            "model" in lowered or
+            "invalid" in lowered and "model" in str(error_data).lower()
+        )
+        
+        if is_model_error:
+            raise requests.RequestException(
+                f"400 Bad Request: {error_message}. "
+                f"Model '{self.model}' may not be available. "
+                f"Try 'gemini-1.5-flash' or 'gemini-1.5-pro' instead."
+            )
+        
+        # Generic 400 error
+        logger.warning("Gemini API 400 error details: %s", error_obj)
+        raise requests.RequestException(
+            f"400 Bad Request: {error_message}. "
+            f"Full error: {error_data}"
+        )
+    
+    _ERROR_HANDLERS = {
+        403: _handle_403,
+        400: _handle_400,
+    }
+    
+    @staticmethod
+    def _build_payload(
+        contents: List[Dict[str, Any]],
+        temperature: float,
+        max_tokens: Optional[int] = None,
+        system_instruction: Optional[str] = None,
+        response_mime_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Assemble a generateContent request body."""
+        payload = {
+            "contents": contents,
+            "generationConfig": dict(_generation_config_items(temperature, max_tokens, response_mime_type))
+        }
+        if system_instruction:
+            payload["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+        return payload
+    
+    @staticmethod
+    def _first_text(response_data: Dict[str, Any]) -> Optional[str]:
+        """Text of the first candidate, or None when the response has no content."""
+        if "candidates" in response_data and len(response_data["candidates"]) > 0:
+            candidate = response_data["candidates"][0]
+            if "content" in candidate and "parts" in candidate["content"]:
+                return candidate["content"]["parts"][0].get("text", "")
+        return None
+    
+    def _text_result(self, response_data: Dict[str, Any], empty_error: str) -> Dict[str, Any]:
+        content = self._first_text(response_data)
+        if content is None:
+            return {"content": None, "error": empty_error}
+        return {"content": content, "error": None}
+    
+    def _error_result(self, e: Exception, request_prefix: str, unexpected_prefix: str) -> Dict[str, Any]:
+        """
+        Map a request failure to the {'content', 'error'} result shape by exception type.
+        
+        Also records the failure's ErrorKind for get_service_status.
+        """
+        error_msg = str(e)
+        self._last_error_msg = error_msg
+        if isinstance(e, PermanentError):
+            # Permanent errors (e.g., leaked API keys) - don't retry
+            self._last_error_kind = ErrorKind.AUTH_FAILED
+            return {"content": None, "error": error_msg}
+        if isinstance(e, CircuitOpenError):
+            self._last_error_kind = ErrorKind.CIRCUIT_OPEN
+            return {
+                "content": None,
+                "error": "Gemini API is temporarily unavailable. Please try again in a moment."
+            }
+        if isinstance(e, requests.RequestException):
+            if isinstance(e, GeminiAuthError):
+                self._last_error_kind = ErrorKind.AUTH_FAILED
+                return {
+                    "content": None,
+                    "error": "API key authentication failed. Please check your GEMINI_API_KEY configuration."
+                }
+            self._last_error_kind = ErrorKind.TRANSIENT
+            return {"content": None, "error": f"{request_prefix}: {error_msg}"}
+        self._last_error_kind = ErrorKind.TRANSIENT
+        return {"content": None, "error": f"{unexpected_prefix}: {error_msg}"}
     
     def generate_content(
         self,
@@ -216,79 +657,119 @@ class GeminiService:
                 "error": "Gemini API key not configured"
             }
         
-        url = f"{self.base_url}/models/{self.model}:generateContent"
-        
-        # Build request payload
-        contents = [{"parts": [{"text": prompt}]}]
-        
-        generation_config = {
-            "temperature": temperature,
-        }
-        if max_tokens:
-            generation_config["maxOutputTokens"] = max_tokens
-        
-        payload = {
-            "contents": contents,
-            "generationConfig": generation_config
-        }
-        
-        if system_instruction:
-            payload["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+        payload = self._build_payload(
+            [{"parts": [{"text": prompt}]}],
+            temperature,
+            max_tokens=max_tokens,
+            system_instruction=system_instruction
+        )
         
         try:
-            response_data = self._make_request(url, payload)
-            self._last_error = None  # Clear error on success
-            
-            if "candidates" in response_data and len(response_data["candidates"]) > 0:
-                candidate = response_data["candidates"][0]
-                if "content" in candidate and "parts" in candidate["content"]:
-                    content = candidate["content"]["parts"][0].get("text", "")
-                    return {
-                        "content": content,
-                        "error": None
-                    }
-            
-            return {
-                "content": None,
-                "error": "No response from Gemini API"
-            }
-        except PermanentError as e:
-            # Permanent errors (e.g., leaked API keys) - don't retry
-            error_msg = str(e)
-            return {
-                "content": None,
-                "error": error_msg
-            }
-        except requests.RequestException as e:
-            error_msg = str(e)
-            # Check for circuit breaker errors
-            if "Circuit breaker" in error_msg and "OPEN" in error_msg:
-                return {
-                    "content": None,
-                    "error": "Gemini API is temporarily unavailable. Please try again in a moment."
-                }
-            # Check for API key errors
-            if "403" in error_msg or "Forbidden" in error_msg:
-                return {
-                    "content": None,
-                    "error": "API key authentication failed. Please check your GEMINI_API_KEY configuration."
-                }
-            return {
-                "content": None,
-                "error": f"Request failed: {error_msg}"
-            }
+            response_data = self._request(self._generate_url, payload, temperature)
+            self._last_error_kind = ErrorKind.OK  # Clear error on success
         except Exception as e:
-            error_msg = str(e)
-            # Check for circuit breaker errors
-            if "Circuit breaker" in error_msg:
-                return {
-                    "content": None,
-                    "error": "Gemini API is temporarily unavailable. Please try again in a moment."
-                }
+            return self._error_result(e, "Request failed", "Unexpected error")
+        return self._text_result(response_data, "No response from Gemini API")
+    
+    async def agenerate_content(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Async version of generate_content; concurrent calls share one HTTP/2 connection."""
+        if not self.is_available():
             return {
                 "content": None,
-                "error": f"Unexpected error: {error_msg}"
+                "error": "Gemini API key not configured"
             }
+        
+        payload = self._build_payload(
+            [{"parts": [{"text": prompt}]}],
+            temperature,
+            max_tokens=max_tokens,
+            system_instruction=system_instruction
+        )
+        
+        try:
+            response_data = await self._arequest(self._generate_url, payload, temperature)
+            self._last_error_kind = ErrorKind.OK  # Clear error on success
+        except Exception as e:
+            return self._error_result(e, "Request failed", "Unexpected error")
+        return self._text_result(response_data, "No response from Gemini API")
+    
+    async def abatch_generate(
+        self,
+        prompts: List[str],
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run agenerate_content for many prompts concurrently.
+        
+        At most BATCH_CONCURRENCY requests are in flight at once; results are
+        returned in the same order as prompts.
+        """
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def _one(prompt: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.agenerate_content(
+                    prompt,
+                    system_instruction=system_instruction,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+        
+        return await asyncio.gather(*(_one(prompt) for prompt in prompts))
+    
+    def batch_generate(
+        self,
+        prompts: List[str],
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Sync counterpart of abatch_generate for callers that are not async, using a thread pool."""
+        if not prompts:
+            return []
+        
+        def _one(prompt: str) -> Dict[str, Any]:
+            return self.generate_content(
+                prompt,
+                system_instruction=system_instruction,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        
+        with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(prompts))) as pool:
+            return list(pool.map(_one, prompts))
+    
+    @staticmethod
+    def _chat_payload(messages: List[Dict[str, str]], temperature: float) -> Dict[str, Any]:
+        """Convert role/content messages to a generateContent request body."""
+        contents = [
+            {"parts": [{"text": msg.get("content", "")}], "role": gemini_role}
+            for msg in messages
+            if (gemini_role := _ROLE_MAP.get(msg.get("role", "user")))
+        ]
+        # The last system message wins, as before
+        system_instruction = None
+        for msg in reversed(messages):
+            if msg.get("role") == "system":
+                system_instruction = msg.get("content", "")
+                break
+        
+        # Ensure we have at least one content
+        if not contents:
+            contents.append({
+                "parts": [{"text": ""}],
+                "role": "user"
+            })
+        
+        return GeminiService._build_payload(contents, temperature, system_instruction=system_instruction)
     
     def chat(
         self,
@@ -311,126 +792,159 @@ class GeminiService:
                 "error": "Gemini API key not configured"
             }
         
-        url = f"{self.base_url}/models/{self.model}:generateContent"
-        
-        # Convert messages to Gemini format
-        contents = []
-        system_instruction = None
-        
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            if role == "system":
-                system_instruction = content
-            elif role == "user":
-                contents.append({
-                    "parts": [{"text": content}],
-                    "role": "user"
-                })
-            elif role == "assistant":
-                contents.append({
-                    "parts": [{"text": content}],
-                    "role": "model"
-                })
+        url = self._generate_url
+        payload = self._chat_payload(messages, temperature)
         
-        payload = {
-            "contents": contents,
-            "generationConfig": {
-                "temperature": temperature
-            }
-        }
-        
-        # Add system instruction if provided
-        if system_instruction:
-            payload["systemInstruction"] = {
-                "parts": [{"text": system_instruction}]
-            }
-        
-        # Ensure we have at least one content
-        if not contents:
-            contents.append({
-                "parts": [{"text": ""}],
-                "role": "user"
-            })
-            payload["contents"] = contents
-        
-        print(f"    [GeminiService.chat] Making API request to {url}...", flush=True)
-        import sys
-        sys.stdout.flush()
+        logger.debug("GeminiService.chat -> %s", url)
         
         try:
-            response_data = self._make_request(url, payload)
-            self._last_error = None  # Clear error on success
-            print(f"    [GeminiService.chat] API request completed", flush=True)
-            
-            if "candidates" in response_data and len(response_data["candidates"]) > 0:
-                candidate = response_data["candidates"][0]
-                if "content" in candidate and "parts" in candidate["content"]:
-                    content = candidate["content"]["parts"][0].get("text", "")
-                    return {
-                        "content": content,
-                        "error": None
-                    }
-            
-            return {
-                "content": None,
-                "error": "No content in response"
-            }
-            
-        except PermanentError as e:
-            # Permanent errors (e.g., leaked API keys) - don't retry
-            error_msg = str(e)
-            return {
-                "content": None,
-                "error": error_msg
-            }
-        except requests.exceptions.RequestException as e:
-            error_msg = str(e)
-            # Check for circuit breaker errors
-            if "Circuit breaker" in error_msg and "OPEN" in error_msg:
-                return {
-                    "content": None,
-                    "error": "Gemini API is temporarily unavailable. Please try again in a moment."
-                }
-            # Check for API key errors
-            if "403" in error_msg or "Forbidden" in error_msg:
-                return {
-                    "content": None,
-                    "error": "API key authentication failed. Please check your GEMINI_API_KEY configuration."
-                }
-            return {
-                "content": None,
-                "error": f"API request failed: {error_msg}"
-            }
+            response_data = self._request(url, payload, temperature)
+            self._last_error_kind = ErrorKind.OK  # Clear error on success
+            logger.debug("GeminiService.chat request completed")
         except Exception as e:
-            error_msg = str(e)
-            # Check for circuit breaker errors
-            if "Circuit breaker" in error_msg:
-                return {
-                    "content": None,
-                    "error": "Gemini API is temporarily unavailable. Please try again in a moment."
-                }
+            return self._error_result(e, "API request failed", "Error")
+        return self._text_result(response_data, "No content in response")
+    
+    async def achat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.1
+    ) -> Dict[str, Any]:
+        """Async version of chat."""
+        if not self.is_available():
             return {
                 "content": None,
-                "error": f"Error: {error_msg}"
+                "error": "Gemini API key not configured"
             }
+        
+        payload = self._chat_payload(messages, temperature)
+        
+        try:
+            response_data = await self._arequest(self._generate_url, payload, temperature)
+            self._last_error_kind = ErrorKind.OK  # Clear error on success
+        except Exception as e:
+            return self._error_result(e, "API request failed", "Error")
+        return self._text_result(response_data, "No content in response")
     
     def extract_json(self, text: str) -> Optional[Dict]:
         """Extract JSON from text response."""
+        if not text:
+            return None
+        # Decode forward from each opening brace; the first complete object wins
+        for match in _JSON_OBJ_RE.finditer(text):
+            try:
+                obj, _ = _DECODER.raw_decode(text, match.start())
+            except ValueError:
+                continue
+            if isinstance(obj, dict):
+                return obj
+        return None
+    
+    def upload_image(self, data, mime_type: str) -> Optional[str]:
+        """
+        Upload raw image bytes once via the Files API and return the file URI.
+        
+        URIs are cached by content hash until shortly before the uploaded file
+        expires, so an image sent with many prompts is uploaded once. Returns
+        None when the upload fails; callers then send the image inline.
+        """
+        key = hashlib.sha256(data).hexdigest()
+        with self._file_uri_lock:
+            entry = self._file_uris.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._file_uris.move_to_end(key)
+                return entry[1]
+        
         try:
-            # Try to find JSON in the response
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
+            response = self._session.post(
+                self._upload_url,
+                data=data,
+                headers={"Content-Type": mime_type, "X-Goog-Upload-Protocol": "raw"},
+                timeout=60
+            )
+            response.raise_for_status()
+            file_uri = orjson.loads(response.content)["file"]["uri"]
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.warning("Gemini file upload failed, sending image inline: %s", e)
+            return None
+        
+        with self._file_uri_lock:
+            self._file_uris[key] = (time.monotonic() + FILE_URI_TTL, file_uri)
+            self._file_uris.move_to_end(key)
+            if len(self._file_uris) > FILE_URI_CACHE_SIZE:
+                self._file_uris.popitem(last=False)
+        return file_uri
+    
+    def _image_part(self, data, mime_type: str) -> Dict[str, Any]:
+        """file_data part for large images that upload successfully, inline base64 otherwise."""
+        if len(data) >= FILES_API_MIN_BYTES:
+            file_uri = self.upload_image(data, mime_type)
+            if file_uri is not None:
+                return {"file_data": {"mime_type": mime_type, "file_uri": file_uri}}
+        return {
+            "inline_data": {
+                "mime_type": mime_type,
+                # Same C encoder as base64.b64encode without the wrapper; accepts mmap/bytes buffers as-is
+                "data": binascii.b2a_base64(data, newline=False).decode("ascii")
+            }
+        }
+    
+    def _encode_image(self, image: Any) -> Optional[Dict[str, Any]]:
+        """Return the request part for one image input, or None to skip it."""
+        mime_type = "image/png"  # default
+        
+        # Handle different image input types
+        if isinstance(image, (str, Path)):
+            image_path = os.fspath(image)
+            
+            # Determine MIME type from extension
+            ext = os.path.splitext(image_path)[1].lower()
+            mime_type = _MIME_TYPES.get(ext, "image/png")
+            
+            # Opening doubles as the existence check (one syscall instead of stat + open)
+            try:
+                f = open(image_path, "rb")
+            except FileNotFoundError:
+                return None
+            
+            # Work straight from a read-only mapping of the file (no intermediate bytes copy)
+            with f:
+                try:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        return self._image_part(mapped, mime_type)
+                except ValueError:
+                    # Empty file - nothing to send
+                    return None
+        elif isinstance(image, bytes):
+            return self._image_part(image, mime_type) if image else None
+        elif isinstance(image, tuple) and len(image) == 3 and image[0] == "base64":
+            # Already encoded upstream - send as is
+            _, mime_type, image_data = image
+            if isinstance(image_data, bytes):
+                image_data = image_data.decode("ascii")
+            if image_data:
+                return {"inline_data": {"mime_type": mime_type, "data": image_data}}
         return None
     
+    def _image_parts(self, prompt: str, images: List[Any]) -> List[Dict[str, Any]]:
+        """Build the prompt and image parts of a multimodal request."""
+        # Build parts with text and images
+        parts = [{"text": prompt}]
+        
+        # File reads, base64 and uploads release the GIL, so multiple images are handled in parallel
+        if len(images) > 1:
+            with ThreadPoolExecutor(max_workers=min(IMAGE_ENCODE_WORKERS, len(images))) as pool:
+                encoded = list(pool.map(self._encode_image, images))
+        else:
+            encoded = [self._encode_image(image) for image in images]
+        
+        parts.extend(part for part in encoded if part is not None)
+        return parts
+    
     def generate_content_with_images(
         self,
         prompt: str,
-        images: List[Union[str, bytes, Path]],
+        images: List[Union[str, bytes, Path, Tuple[str, str, Union[str, bytes]]]],
         system_instruction: Optional[str] = None,
         temperature: float = 0.1,
         max_tokens: Optional[int] = None,
@@ -441,7 +955,8 @@ class GeminiService:
         
         Args:
             prompt: User prompt
-            images: List of image paths (str/Path) or image bytes
+            images: List of image paths (str/Path), raw image bytes, or
+                ("base64", mime_type, data) tuples for images already base64-encoded
             system_instruction: System instruction (optional)
             temperature: Temperature for generation
             max_tokens: Maximum tokens (optional)
@@ -456,111 +971,97 @@ class GeminiService:
                 "error": "Gemini API key not configured"
             }
         
-        url = f"{self.base_url}/models/{self.model}:generateContent"
-        
-        # Build parts with text and images
-        parts = [{"text": prompt}]
-        
-        # Add images
-        for image in images:
-            image_data = None
-            mime_type = "image/png"  # default
-            
-            # Handle different image input types
-            if isinstance(image, (str, Path)):
-                image_path = Path(image)
-                if not image_path.exists():
-                    continue
-                
-                # Determine MIME type from extension
-                ext = image_path.suffix.lower()
-                mime_type_map = {
-                    ".png": "image/png",
-                    ".jpg": "image/jpeg",
-                    ".jpeg": "image/jpeg",
-                    ".gif": "image/gif",
-                    ".webp": "image/webp"
-                }
-                mime_type = mime_type_map.get(ext, "image/png")
-                
-                # Read image file
-                with open(image_path, "rb") as f:
-                    image_data = base64.b64encode(f.read()).decode("utf-8")
-            elif isinstance(image, bytes):
-                image_data = base64.b64encode(image).decode("utf-8")
-            else:
-                continue
-            
-            if image_data:
-                parts.append({
-                    "inline_data": {
-                        "mime_type": mime_type,
-                        "data": image_data
-                    }
-                })
-        
-        contents = [{"parts": parts}]
-        
-        generation_config = {
-            "temperature": temperature,
-        }
-        if max_tokens:
-            generation_config["maxOutputTokens"] = max_tokens
-        if response_mime_type:
-            generation_config["response_mime_type"] = response_mime_type
-        
-        payload = {
-            "contents": contents,
-            "generationConfig": generation_config
-        }
-        
-        if system_instruction:
-            payload["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+        payload = self._build_payload(
+            [{"parts": self._image_parts(prompt, images)}],
+            temperature,
+            max_tokens=max_tokens,
+            system_instruction=system_instruction,
+            response_mime_type=response_mime_type
+        )
         
         try:
-            response_data = self._make_request(url, payload)
-            
-            if "candidates" in response_data and len(response_data["candidates"]) > 0:
-                candidate = response_data["candidates"][0]
-                if "content" in candidate and "parts" in candidate["content"]:
-                    # Handle JSON response
-                    if response_mime_type == "application/json":
-                        content = candidate["content"]["parts"][0].get("text", "")
-                        try:
-                            # Try to parse as JSON
-                            json_content = json.loads(content)
-                            return {
-                                "content": json_content,
-                                "error": None
-                            }
-                        except json.JSONDecodeError:
-                            # Return raw text if JSON parsing fails
-                            return {
-                                "content": content,
-                                "error": None
-                            }
-                    else:
-                        content = candidate["content"]["parts"][0].get("text", "")
-                        return {
-                            "content": content,
-                            "error": None
-                        }
-            
-            return {
-                "content": None,
-                "error": "No response from Gemini API"
-            }
-        except requests.RequestException as e:
+            response_data = self._request(self._generate_url, payload, temperature)
+            self._last_error_kind = ErrorKind.OK  # Clear error on success
+        except Exception as e:
+            return self._error_result(e, "Request failed", "Unexpected error")
+        return self._image_result(response_data, response_mime_type)
+    
+    async def agenerate_content_with_images(
+        self,
+        prompt: str,
+        images: List[Union[str, bytes, Path, Tuple[str, str, Union[str, bytes]]]],
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None,
+        response_mime_type: Optional[str] = "application/json"
+    ) -> Dict[str, Any]:
+        """Async version of generate_content_with_images (per-page OCR can run pages concurrently)."""
+        if not self.is_available():
             return {
                 "content": None,
-                "error": f"Request failed: {str(e)}"
+                "error": "Gemini API key not configured"
             }
+        
+        # Reading and encoding image files is blocking work
+        parts = await asyncio.to_thread(self._image_parts, prompt, images)
+        payload = self._build_payload(
+            [{"parts": parts}],
+            temperature,
+            max_tokens=max_tokens,
+            system_instruction=system_instruction,
+            response_mime_type=response_mime_type
+        )
+        
+        try:
+            response_data = await self._arequest(self._generate_url, payload, temperature)
+            self._last_error_kind = ErrorKind.OK  # Clear error on success
         except Exception as e:
+            return self._error_result(e, "Request failed", "Unexpected error")
+        return self._image_result(response_data, response_mime_type)
+    
+    def _image_result(self, response_data: Dict[str, Any], response_mime_type: Optional[str]) -> Dict[str, Any]:
+        content = self._first_text(response_data)
+        if content is None:
             return {
                 "content": None,
-                "error": f"Unexpected error: {str(e)}"
+                "error": "No response from Gemini API"
             }
+        # Handle JSON response
+        if response_mime_type == "application/json":
+            try:
+                # Try to parse as JSON
+                return {
+                    "content": orjson.loads(_strip_code_fence(content)),
+                    "error": None
+                }
+            except orjson.JSONDecodeError:
+                # Return raw text if JSON parsing fails
+                pass
+        return {
+            "content": content,
+            "error": None
+        }
+
+
+_gemini_service = None
+
+
+def get_gemini_service() -> GeminiService:
+    """Get or create the shared GeminiService (created on first use)."""
+    global _gemini_service
+    if _gemini_service is None:
+        _gemini_service = GeminiService()
+    return _gemini_service
+
+
+async def close_gemini_service():
+    """Close the shared GeminiService's async client, without creating the service if it was never used."""
+    if _gemini_service is not None:
+        await _gemini_service.aclose()
 
-# Global instance
-gemini_service = GeminiService()
 
+def __getattr__(attr: str):
+    # Keep `from utils.gemini_service import gemini_service` working without constructing at import time
+    if attr == "gemini_service":
+        return get_gemini_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
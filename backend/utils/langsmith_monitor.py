@@ -3,8 +3,54 @@ LangSmith monitoring integration for LLM call tracking, prompt versioning, and c
 """
 from typing import Optional, Dict, Any
 from utils.config import settings
+from functools import lru_cache
 import sys
 import os
+import threading
+
+
+# Cost per 1M tokens (as of 2024)
+_COST_TABLE: Dict[str, Dict[str, Dict[str, float]]] = {
+    "openai": {
+        "gpt-4o": {"input": 2.50, "output": 10.00},  # per 1M tokens
+        "gpt-4": {"input": 30.00, "output": 60.00},
+        "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+    },
+    "anthropic": {
+        "claude-3-5-sonnet-20241022": {"input": 3.00, "output": 15.00},
+        "claude-3-opus": {"input": 15.00, "output": 75.00},
+        "claude-3-sonnet": {"input": 3.00, "output": 15.00},
+    },
+    "google": {
+        "gemini-2.0-flash": {"input": 0.075, "output": 0.30},  # Very cheap
+        "gemini-pro": {"input": 0.50, "output": 1.50},
+    }
+}
+
+# Lowercased model names per provider, scanned in order for the closest-match fallback
+_COST_FALLBACKS: Dict[str, tuple] = {
+    provider: tuple((name.lower(), costs) for name, costs in models.items())
+    for provider, models in _COST_TABLE.items()
+}
+
+
+@lru_cache(maxsize=256)
+def _lookup_model_costs(provider_lower: str, model: str) -> Optional[Dict[str, float]]:
+    """Resolve a model's per-1M-token costs; results are memoized per (provider, model)."""
+    models = _COST_TABLE.get(provider_lower)
+    if models is None:
+        return None
+    
+    model_costs = models.get(model)
+    if model_costs:
+        return model_costs
+    
+    # Try to find closest match
+    model_lower = model.lower()
+    for name_lower, costs in _COST_FALLBACKS[provider_lower]:
+        if name_lower in model_lower or model_lower in name_lower:
+            return costs
+    return None
 
 
 class LangSmithMonitor:
@@ -13,35 +59,43 @@ class LangSmithMonitor:
     def __init__(self):
         """Initialize LangSmith monitoring."""
         self.enabled = False
+        self._context = threading.local()
         self._initialize()
     
     def _initialize(self):
         """Initialize LangSmith if configured."""
         try:
             # Check for LangSmith API key
-            langsmith_api_key = os.getenv("LANGCHAIN_API_KEY") or os.getenv("LANGSMITH_API_KEY")
-            langsmith_tracing = os.getenv("LANGCHAIN_TRACING_V2", "false").lower()
+            environ = os.environ
+            langsmith_api_key = environ.get("LANGCHAIN_API_KEY") or environ.get("LANGSMITH_API_KEY")
+            langsmith_tracing = environ.get("LANGCHAIN_TRACING_V2", "false")
+            self.enabled = bool(langsmith_api_key) and langsmith_tracing.lower() == "true"
             
-            if langsmith_api_key and langsmith_tracing == "true":
-                # Set environment variables for LangChain
-                os.environ["LANGCHAIN_API_KEY"] = langsmith_api_key
-                os.environ["LANGCHAIN_TRACING_V2"] = "true"
-                os.environ["LANGCHAIN_ENDPOINT"] = os.getenv("LANGCHAIN_ENDPOINT", "https://api.smith.langchain.com")
-                os.environ["LANGCHAIN_PROJECT"] = os.getenv("LANGCHAIN_PROJECT", "novaintel")
-                
-                # Enable monitoring
-                self.enabled = True
-                print("[OK] LangSmith monitoring enabled", file=sys.stderr, flush=True)
-                print(f"   Project: {os.getenv('LANGCHAIN_PROJECT', 'novaintel')}", file=sys.stderr, flush=True)
-                print(f"   Endpoint: {os.getenv('LANGCHAIN_ENDPOINT', 'https://api.smith.langchain.com')}", file=sys.stderr, flush=True)
-            else:
-                self.enabled = False
+            if not self.enabled:
+                # Common case: leave os.environ untouched
                 if langsmith_api_key:
                     print("[INFO] LangSmith API key found but tracing not enabled", file=sys.stderr, flush=True)
                     print("   Set LANGCHAIN_TRACING_V2=true to enable monitoring", file=sys.stderr, flush=True)
                 else:
                     print("[INFO] LangSmith monitoring not configured", file=sys.stderr, flush=True)
                     print("   Set LANGCHAIN_API_KEY and LANGCHAIN_TRACING_V2=true to enable", file=sys.stderr, flush=True)
+                return
+            
+            # Set environment variables for LangChain (only the ones that differ)
+            endpoint = environ.get("LANGCHAIN_ENDPOINT", "https://api.smith.langchain.com")
+            project = environ.get("LANGCHAIN_PROJECT", "novaintel")
+            for key, value in (
+                ("LANGCHAIN_API_KEY", langsmith_api_key),
+                ("LANGCHAIN_TRACING_V2", "true"),
+                ("LANGCHAIN_ENDPOINT", endpoint),
+                ("LANGCHAIN_PROJECT", project),
+            ):
+                if environ.get(key) != value:
+                    environ[key] = value
+            
+            print("[OK] LangSmith monitoring enabled", file=sys.stderr, flush=True)
+            print(f"   Project: {project}", file=sys.stderr, flush=True)
+            print(f"   Endpoint: {endpoint}", file=sys.stderr, flush=True)
         except Exception as e:
             print(f"[WARNING] LangSmith initialization failed: {e}", file=sys.stderr, flush=True)
             self.enabled = False
@@ -83,37 +137,43 @@ class LangSmithMonitor:
         if not self.enabled:
             return
         
-        try:
-            # Set run name via environment or context
-            os.environ["LANGCHAIN_RUN_NAME"] = name
-        except Exception as e:
-            print(f"[WARNING] Failed to set run name: {e}", file=sys.stderr, flush=True)
+        # Per-thread trace context; os.environ writes are process-wide and go through putenv
+        self._context.run_name = name
     
     def set_tags(self, tags: list):
         """Set tags for current trace."""
         if not self.enabled:
             return
         
-        try:
-            # Set tags via environment
-            if tags:
-                os.environ["LANGCHAIN_TAGS"] = ",".join(tags)
-        except Exception as e:
-            print(f"[WARNING] Failed to set tags: {e}", file=sys.stderr, flush=True)
+        if tags:
+            self._context.tags = list(tags)
     
     def set_metadata(self, metadata: Dict[str, Any]):
         """Set metadata for current trace."""
         if not self.enabled:
             return
         
-        try:
-            # LangSmith tracks metadata automatically with LangChain
-            # Store in environment for context
-            for key, value in metadata.items():
-                env_key = f"LANGCHAIN_METADATA_{key.upper()}"
-                os.environ[env_key] = str(value)
-        except Exception as e:
-            print(f"[WARNING] Failed to set metadata: {e}", file=sys.stderr, flush=True)
+        self._context.metadata = dict(metadata)
+    
+    def get_trace_config(self) -> Dict[str, Any]:
+        """
+        Return the run name, tags and metadata set on this thread.
+        
+        The keys match LangChain's RunnableConfig, so the result can be passed
+        as `config=` or applied to a chat model's `tags`/`metadata` fields.
+        """
+        context = self._context
+        config: Dict[str, Any] = {}
+        run_name = getattr(context, "run_name", None)
+        if run_name:
+            config["run_name"] = run_name
+        tags = getattr(context, "tags", None)
+        if tags:
+            config["tags"] = tags
+        metadata = getattr(context, "metadata", None)
+        if metadata:
+            config["metadata"] = metadata
+        return config
     
     def get_cost_estimate(
         self,
@@ -134,35 +194,7 @@ class LangSmithMonitor:
         Returns:
             Estimated cost in USD
         """
-        # Cost per 1M tokens (as of 2024)
-        cost_estimates = {
-            "openai": {
-                "gpt-4o": {"input": 2.50, "output": 10.00},  # per 1M tokens
-                "gpt-4": {"input": 30.00, "output": 60.00},
-                "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
-            },
-            "anthropic": {
-                "claude-3-5-sonnet-20241022": {"input": 3.00, "output": 15.00},
-                "claude-3-opus": {"input": 15.00, "output": 75.00},
-                "claude-3-sonnet": {"input": 3.00, "output": 15.00},
-            },
-            "google": {
-                "gemini-2.0-flash": {"input": 0.075, "output": 0.30},  # Very cheap
-                "gemini-pro": {"input": 0.50, "output": 1.50},
-            }
-        }
-        
-        provider_lower = provider.lower()
-        if provider_lower not in cost_estimates:
-            return None
-        
-        model_costs = cost_estimates[provider_lower].get(model)
-        if not model_costs:
-            # Try to find closest match
-            for model_name, costs in cost_estimates[provider_lower].items():
-                if model_name.lower() in model.lower() or model.lower() in model_name.lower():
-                    model_costs = costs
-                    break
+        model_costs = _lookup_model_costs(provider.lower(), model)
         
         if not model_costs:
             return None
@@ -174,6 +206,19 @@ class LangSmithMonitor:
         return input_cost + output_cost
 
 
-# Global instance
-langsmith_monitor = LangSmithMonitor()
+_langsmith_monitor = None
+
+
+def get_langsmith_monitor() -> LangSmithMonitor:
+    """Get or create the shared LangSmithMonitor (initialized on first use)."""
+    global _langsmith_monitor
+    if _langsmith_monitor is None:
+        _langsmith_monitor = LangSmithMonitor()
+    return _langsmith_monitor
+
 
+def __getattr__(attr: str):
+    # Keep `from utils.langsmith_monitor import langsmith_monitor` working without constructing at import time
+    if attr == "langsmith_monitor":
+        return get_langsmith_monitor()
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
@@ -0,0 +1,173 @@
+"""
+Batching Invoker - Coalesce concurrent single-prompt Gemini calls into one request.
+"""
+from typing import Optional, Dict, Any, List, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import logging
+import queue
+import threading
+import time
+from utils.gemini_service import _strip_code_fence
+
+logger = logging.getLogger(__name__)
+
+# A batch is sent when it reaches BATCH_MAX_SIZE prompts or BATCH_MAX_WAIT seconds after its first prompt
+BATCH_MAX_SIZE = 16
+BATCH_MAX_WAIT = 0.025
+BATCH_DISPATCH_WORKERS = 4
+
+_BATCH_PROMPT_HEADER = (
+    "Process each of the following {count} inputs independently. "
+    "Return only a JSON array of exactly {count} strings, where element i is "
+    "the complete response to input i. Do not add any other text.\n\n"
+)
+
+
+def _fail_pending(futures: List[Future], error: BaseException):
+    """Fail every future that hasn't been resolved, so no submit() blocks forever."""
+    for future in futures:
+        if not future.done():
+            future.set_exception(error)
+
+
+class BatchingInvoker:
+    """
+    Collects prompts submitted from concurrent threads and sends each group
+    sharing a system instruction and temperature as one multi-input prompt.
+    
+    If the batched reply can't be split into one output per prompt, the
+    prompts are re-sent individually, so callers always get a per-prompt result.
+    """
+    
+    def __init__(
+        self,
+        service,
+        max_batch: int = BATCH_MAX_SIZE,
+        max_wait: float = BATCH_MAX_WAIT
+    ):
+        self.service = service
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Tuple[str, Optional[str], float, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._dispatcher = ThreadPoolExecutor(
+            max_workers=BATCH_DISPATCH_WORKERS,
+            thread_name_prefix="llm-batch"
+        )
+    
+    def submit(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.1
+    ) -> Dict[str, Any]:
+        """Queue a prompt and block until its {'content', 'error'} result is ready."""
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((prompt, system_instruction, temperature, future))
+        return future.result()
+    
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="llm-batcher", daemon=True)
+                self._worker.start()
+    
+    def _run(self):
+        """Drain the queue into batches and hand each group to the dispatcher."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            groups: Dict[Tuple[Optional[str], float], List[Tuple[str, Future]]] = {}
+            for prompt, system_instruction, temperature, future in batch:
+                groups.setdefault((system_instruction, temperature), []).append((prompt, future))
+            for (system_instruction, temperature), items in groups.items():
+                try:
+                    self._dispatcher.submit(self._dispatch, items, system_instruction, temperature)
+                except Exception as e:
+                    logger.error("Could not dispatch a batch of %d prompts: %s", len(items), e)
+                    _fail_pending([future for _, future in items], e)
+    
+    def _dispatch(self, items: List[Tuple[str, Future]], system_instruction: Optional[str], temperature: float):
+        prompts = [prompt for prompt, _ in items]
+        futures = [future for _, future in items]
+        try:
+            if len(items) == 1:
+                results = [self.service.generate_content(
+                    prompts[0],
+                    system_instruction=system_instruction,
+                    temperature=temperature
+                )]
+            else:
+                results = self._batched(prompts, system_instruction, temperature)
+            for future, result in zip(futures, results):
+                future.set_result(result)
+        except Exception as e:
+            _fail_pending(futures, e)
+        finally:
+            # Only reached with unresolved futures if results came back short
+            _fail_pending(futures, RuntimeError(
+                f"Batch of {len(items)} prompts returned fewer results than prompts"
+            ))
+    
+    def _batched(self, prompts: List[str], system_instruction: Optional[str], temperature: float) -> List[Dict[str, Any]]:
+        """Send prompts as one request; fall back to individual requests if the reply doesn't split."""
+        combined = _BATCH_PROMPT_HEADER.format(count=len(prompts)) + "\n\n".join(
+            f"### Input {i}\n{prompt}" for i, prompt in enumerate(prompts, 1)
+        )
+        result = self.service.generate_content(
+            combined,
+            system_instruction=system_instruction,
+            temperature=temperature
+        )
+        
+        outputs = None
+        if not result.get("error") and result.get("content"):
+            try:
+                outputs = json.loads(_strip_code_fence(result["content"]))
+            except ValueError:
+                outputs = None
+        
+        if isinstance(outputs, list) and len(outputs) == len(prompts):
+            return [
+                {
+                    "content": output if isinstance(output, str) else json.dumps(output),
+                    "error": None
+                }
+                for output in outputs
+            ]
+        
+        logger.debug("Batched reply for %d prompts did not split; sending individually", len(prompts))
+        return self.service.batch_generate(
+            prompts,
+            system_instruction=system_instruction,
+            temperature=temperature
+        )
+
+
+_batching_invoker = None
+_batching_invoker_lock = threading.Lock()
+
+
+def get_batching_invoker() -> BatchingInvoker:
+    """Get or create the shared BatchingInvoker for the Gemini service."""
+    global _batching_invoker
+    if _batching_invoker is None:
+        with _batching_invoker_lock:
+            if _batching_invoker is None:
+                from utils.gemini_service import get_gemini_service
+                _batching_invoker = BatchingInvoker(get_gemini_service())
+    return _batching_invoker
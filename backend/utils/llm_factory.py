@@ -2,14 +2,54 @@
 LLM Factory - Create LLM instances for different providers.
 Supports Gemini, OpenAI, and Claude with intelligent routing.
 """
-from typing import Optional, Any, Literal
+from typing import Optional, Any, Literal, List, Tuple
 from langchain_core.runnables import Runnable
 from utils.config import settings
-from utils.gemini_service import gemini_service
+from utils.gemini_service import get_gemini_service
 from utils.model_router import model_router, TaskType
-from utils.langsmith_monitor import langsmith_monitor
+from utils.langsmith_monitor import get_langsmith_monitor
+from services.cache.llm_cache import llm_cache, LLM_CACHE_MAX_TEMPERATURE
+from utils.llm_batcher import get_batching_invoker
+import logging
 import sys
 
+logger = logging.getLogger(__name__)
+
+# LangChain message types/roles to chat roles; anything else is sent as "user"
+_MESSAGE_ROLES = {"system": "system", "ai": "assistant", "assistant": "assistant"}
+
+
+def _normalize_messages(messages) -> Tuple[List[dict], Optional[str]]:
+    """
+    Convert LangChain messages (or role/content dicts) to chat messages.
+    
+    Returns (formatted_messages, system_instruction); system messages are
+    pulled out, the last one winning.
+    """
+    formatted_messages = []
+    system_instruction = None
+    
+    for msg in messages:
+        if isinstance(msg, str):
+            content, role = msg, None
+        elif isinstance(msg, dict):
+            content, role = msg.get("content", ""), msg.get("role")
+        else:
+            content = getattr(msg, "content", None)
+            if content is None:
+                content = str(msg)
+            # LangChain messages carry .type ("human", "ai", "system"); ChatMessage also has .role
+            role = getattr(msg, "type", None) or getattr(msg, "role", None)
+        
+        role = _MESSAGE_ROLES.get(role, "user")
+        if role == "system":
+            system_instruction = content
+        else:
+            formatted_messages.append({"role": role, "content": content})
+    
+    return formatted_messages, system_instruction
+
+
 # LangChain compatible wrapper for Gemini
 class GeminiLangChainWrapper(Runnable):
     """Wrapper to make Gemini service compatible with LangChain."""
@@ -17,7 +57,59 @@ class GeminiLangChainWrapper(Runnable):
     def __init__(self, temperature: float = 0.1):
         super().__init__()
         self.temperature = temperature
-        self.service = gemini_service
+        self.service = get_gemini_service()
+    
+    def _cached_call(self, call, **key_parts) -> dict:
+        """Run a service call, reusing a shared cached response for low-temperature calls."""
+        key = llm_cache.cache_key(self.service.model, self.temperature, **key_parts)
+        content = llm_cache.get(key)
+        if content is not None:
+            return {"content": content, "error": None}
+        
+        result = call()
+        if not result.get("error"):
+            llm_cache.set(key, result.get("content"))
+        return result
+    
+    def _chat(self, messages: list) -> dict:
+        return self._cached_call(
+            lambda: self.service.chat(messages, temperature=self.temperature),
+            messages=messages
+        )
+    
+    def _generate(self, prompt: str, system_instruction: Optional[str] = None) -> dict:
+        if settings.LLM_BATCH_ENABLED and self.temperature <= LLM_CACHE_MAX_TEMPERATURE:
+            # Concurrent deterministic prompts share one round-trip
+            call = lambda: get_batching_invoker().submit(prompt, system_instruction, self.temperature)
+        else:
+            call = lambda: self.service.generate_content(
+                prompt,
+                system_instruction=system_instruction,
+                temperature=self.temperature
+            )
+        return self._cached_call(
+            call,
+            prompt=prompt,
+            system=system_instruction
+        )
+    
+    def _invoke_messages(self, messages) -> dict:
+        """Send LangChain/role-content messages via chat, or generate_content if only a system message."""
+        formatted_messages, system_instruction = _normalize_messages(messages)
+        
+        # Use chat if we have messages, otherwise use generate_content
+        if formatted_messages:
+            # If we have system instruction, add it as a system message at the beginning
+            if system_instruction:
+                formatted_messages.insert(0, {
+                    "role": "system",
+                    "content": system_instruction
+                })
+            logger.debug("GeminiLangChainWrapper: chat() with %d messages", len(formatted_messages))
+            return self._chat(formatted_messages)
+        
+        # Fallback to generate_content
+        return self._generate(system_instruction or "")
     
     def invoke(self, input: Any, config: Optional[dict] = None) -> 'GeminiResponse':
         """Invoke the LLM with a prompt."""
@@ -27,110 +119,24 @@ class GeminiLangChainWrapper(Runnable):
         if hasattr(prompt_input, 'messages'):
             # LangChain ChatPromptTemplate result
             try:
-                messages = prompt_input.messages
-                formatted_messages = []
-                system_instruction = None
-                
-                for msg in messages:
-                    # Extract content and role from LangChain message
-                    if hasattr(msg, 'content'):
-                        content = msg.content
-                    elif isinstance(msg, str):
-                        content = msg
-                    else:
-                        content = str(msg)
-                    
-                    # Determine role
-                    role = "user"
-                    if hasattr(msg, 'type'):
-                        msg_type = msg.type
-                        if msg_type == "system":
-                            system_instruction = content
-                            continue
-                        elif msg_type == "ai" or msg_type == "assistant":
-                            role = "assistant"
-                        else:
-                            role = "user"
-                    elif hasattr(msg, 'role'):
-                        msg_role = msg.role
-                        if msg_role == "system":
-                            system_instruction = content
-                            continue
-                        elif msg_role == "assistant" or msg_role == "ai":
-                            role = "assistant"
-                        else:
-                            role = "user"
-                    
-                    formatted_messages.append({
-                        "role": role,
-                        "content": content
-                    })
-                
-                # Use chat if we have messages, otherwise use generate_content
-                if formatted_messages:
-                    # If we have system instruction, add it as a system message at the beginning
-                    if system_instruction:
-                        formatted_messages.insert(0, {
-                            "role": "system",
-                            "content": system_instruction
-                        })
-                    print(f"    [GeminiLangChainWrapper] Calling chat() with {len(formatted_messages)} messages...", flush=True)
-                    import sys
-                    sys.stdout.flush()
-                    result = self.service.chat(formatted_messages, temperature=self.temperature)
-                    print(f"    [GeminiLangChainWrapper] chat() returned", flush=True)
-                else:
-                    # Fallback to generate_content
-                    prompt_text = system_instruction or ""
-                    result = self.service.generate_content(prompt_text, temperature=self.temperature)
+                result = self._invoke_messages(prompt_input.messages)
             except Exception as e:
                 # If message parsing fails, try to convert to string
                 prompt_text = str(prompt_input)
-                result = self.service.generate_content(prompt_text, temperature=self.temperature)
+                result = self._generate(prompt_text)
         
         # Handle dict format
         elif isinstance(prompt_input, dict):
             if "messages" in prompt_input:
-                messages = prompt_input["messages"]
-                formatted_messages = []
-                system_instruction = None
-                
-                for msg in messages:
-                    if hasattr(msg, 'content'):
-                        content = msg.content
-                        role = "user"
-                        if hasattr(msg, 'role'):
-                            role = msg.role if msg.role != "system" else "system"
-                        elif hasattr(msg, 'type'):
-                            role = msg.type if msg.type != "system" else "system"
-                    else:
-                        content = str(msg)
-                        role = "user"
-                    
-                    if role == "system":
-                        system_instruction = content
-                    else:
-                        formatted_messages.append({
-                            "role": role if role != "assistant" else "assistant",
-                            "content": content
-                        })
-                
-                result = self.service.chat(formatted_messages, temperature=self.temperature)
+                result = self._invoke_messages(prompt_input["messages"])
             else:
                 # Simple text prompt
                 prompt = str(prompt_input.get("input", prompt_input))
                 system_instruction = prompt_input.get("system", None)
-                result = self.service.generate_content(
-                    prompt,
-                    system_instruction=system_instruction,
-                    temperature=self.temperature
-                )
+                result = self._generate(prompt, system_instruction=system_instruction)
         else:
             # Direct string or other format
-            result = self.service.generate_content(
-                str(prompt_input),
-                temperature=self.temperature
-            )
+            result = self._generate(str(prompt_input))
         
         # Return the content as a string for LangChain compatibility
         # LangChain output parsers (PydanticOutputParser) expect a string, not a custom object
@@ -192,6 +198,7 @@ def get_llm(
     model_name = model or model_router.get_model_name(provider, task_type)
     
     # Set LangSmith monitoring metadata if enabled
+    langsmith_monitor = get_langsmith_monitor()
     if langsmith_monitor.is_enabled():
         langsmith_monitor.set_run_name(f"{provider}:{model_name}")
         langsmith_monitor.set_tags([provider, model_name, task_type.value if task_type else "default"])
@@ -217,6 +224,7 @@ def get_llm(
             # Tag for LangSmith
             if langsmith_monitor.is_enabled():
                 llm.tags = ["openai", model_name]
+                llm.metadata = langsmith_monitor.get_trace_config().get("metadata")
             return llm
         except ImportError:
             print("[WARNING] langchain-openai not installed. Install with: pip install langchain-openai", file=sys.stderr, flush=True)
@@ -234,6 +242,7 @@ def get_llm(
             # Tag for LangSmith
             if langsmith_monitor.is_enabled():
                 llm.tags = ["anthropic", model_name]
+                llm.metadata = langsmith_monitor.get_trace_config().get("metadata")
             return llm
         except ImportError:
             print("[WARNING] langchain-anthropic not installed. Install with: pip install langchain-anthropic", file=sys.stderr, flush=True)
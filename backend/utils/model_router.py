@@ -2,7 +2,7 @@
 Model Router - Intelligently routes tasks to the best LLM model.
 Supports Gemini (fast, cost-effective), Claude (reasoning), and OpenAI (quality).
 """
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, Literal, Tuple
 from enum import Enum
 from utils.config import settings
 import sys
@@ -26,10 +26,17 @@ class ModelRouter:
         self.gemini_available = False
         self.openai_available = False
         self.claude_available = False
+        # Routing is a pure function of the arguments and the availability flags,
+        # so answers are memoized until _initialize re-checks availability
+        self._selection_cache: Dict[Tuple[TaskType, Optional[str]], str] = {}
+        self._model_name_cache: Dict[Tuple[str, Optional[TaskType]], str] = {}
         self._initialize()
     
     def _initialize(self):
         """Initialize and check model availability."""
+        self._selection_cache.clear()
+        self._model_name_cache.clear()
+        
         # Check Gemini
         if settings.GEMINI_API_KEY:
             try:
@@ -89,6 +96,19 @@ class ModelRouter:
         Returns:
             Provider name: "gemini", "openai", or "claude"
         """
+        key = (task_type, prefer_provider)
+        provider = self._selection_cache.get(key)
+        if provider is None:
+            provider = self._select_model(task_type, prefer_provider)
+            self._selection_cache[key] = provider
+        return provider
+    
+    def _select_model(
+        self,
+        task_type: TaskType,
+        prefer_provider: Optional[str]
+    ) -> str:
+        """Uncached routing ladder behind select_model."""
         # Use preferred provider if available and suitable
         if prefer_provider == "gemini" and self.gemini_available:
             return "gemini"
@@ -166,6 +186,15 @@ class ModelRouter:
     
     def get_model_name(self, provider: str, task_type: Optional[TaskType] = None) -> str:
         """Get the specific model name for a provider."""
+        key = (provider, task_type)
+        model = self._model_name_cache.get(key)
+        if model is None:
+            model = self._get_model_name(provider, task_type)
+            self._model_name_cache[key] = model
+        return model
+    
+    def _get_model_name(self, provider: str, task_type: Optional[TaskType]) -> str:
+        """Uncached lookup behind get_model_name."""
         if provider == "gemini":
             # Use configured model or fallback to stable model
             model = getattr(settings, "GEMINI_MODEL", "gemini-1.5-flash")
@@ -3,6 +3,7 @@ PII (Personally Identifiable Information) Sanitization Utility.
 Removes or masks sensitive information before sending to AI models.
 """
 import re
+from functools import lru_cache
 from typing import Dict, Any, List
 
 class PIISanitizer:
@@ -27,6 +28,40 @@ class PIISanitizer:
     # IP address pattern
     IP_PATTERN = re.compile(r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b')
     
+    # All of the above as one alternation so sanitize_text scans the text once.
+    # Specific shapes come before the loose phone patterns so an SSN, card number
+    # or IP address keeps its own mask instead of being swallowed as a phone number.
+    PII_PATTERN = re.compile("|".join(
+        f"(?P<{name}>{pattern.pattern})"
+        for name, pattern in (
+            ("email", EMAIL_PATTERN),
+            ("credit_card", CREDIT_CARD_PATTERN),
+            ("ssn", SSN_PATTERN),
+            ("ip", IP_PATTERN),
+            ("phone_us", PHONE_PATTERNS[0]),
+            ("phone_intl", PHONE_PATTERNS[1]),
+            ("phone_digits", PHONE_PATTERNS[2]),
+        )
+    ))
+    
+    # Cheap pre-check: text without "@" or digits cannot match PII_PATTERN
+    _CANDIDATE_PATTERN = re.compile(r'[@\d]')
+    
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _replacements(mask_char: str) -> Dict[str, str]:
+        """Mask for each PII_PATTERN group name."""
+        phone = mask_char * 10
+        return {
+            "email": f'{mask_char * 5}@example.com',
+            "credit_card": mask_char * 16,
+            "ssn": f'{mask_char * 3}-{mask_char * 2}-{mask_char * 4}',
+            "ip": f'{mask_char * 3}.{mask_char * 3}.{mask_char * 3}.{mask_char * 3}',
+            "phone_us": phone,
+            "phone_intl": phone,
+            "phone_digits": phone,
+        }
+    
     @classmethod
     def sanitize_text(cls, text: str, mask_char: str = "*") -> str:
         """
@@ -39,33 +74,17 @@ class PIISanitizer:
         Returns:
             Sanitized text
         """
-        if not text:
+        # Every pattern needs an "@" or a digit; most prose has neither
+        if not text or not cls._CANDIDATE_PATTERN.search(text):
             return text
         
-        sanitized = text
-        
-        # Replace emails
-        sanitized = cls.EMAIL_PATTERN.sub(f'{mask_char * 5}@example.com', sanitized)
-        
-        # Replace phone numbers
-        for pattern in cls.PHONE_PATTERNS:
-            sanitized = pattern.sub(f'{mask_char * 10}', sanitized)
-        
-        # Replace credit cards
-        sanitized = cls.CREDIT_CARD_PATTERN.sub(f'{mask_char * 16}', sanitized)
-        
-        # Replace SSN
-        sanitized = cls.SSN_PATTERN.sub(f'{mask_char * 3}-{mask_char * 2}-{mask_char * 4}', sanitized)
-        
-        # Replace IP addresses
-        sanitized = cls.IP_PATTERN.sub(f'{mask_char * 3}.{mask_char * 3}.{mask_char * 3}.{mask_char * 3}', sanitized)
-        
-        return sanitized
+        replacements = cls._replacements(mask_char)
+        return cls.PII_PATTERN.sub(lambda match: replacements[match.lastgroup], text)
     
     @classmethod
     def sanitize_dict(cls, data: Dict[str, Any], mask_char: str = "*") -> Dict[str, Any]:
         """
-        Recursively sanitize PII from dictionary values.
+        Sanitize PII from dictionary values, including nested dicts and lists.
         
         Args:
             data: Dictionary to sanitize
@@ -77,21 +96,32 @@ class PIISanitizer:
         if not isinstance(data, dict):
             return data
         
-        sanitized = {}
-        for key, value in data.items():
-            if isinstance(value, str):
-                sanitized[key] = cls.sanitize_text(value, mask_char)
-            elif isinstance(value, dict):
-                sanitized[key] = cls.sanitize_dict(value, mask_char)
-            elif isinstance(value, list):
-                sanitized[key] = [
-                    cls.sanitize_dict(item, mask_char) if isinstance(item, dict)
-                    else cls.sanitize_text(item, mask_char) if isinstance(item, str)
-                    else item
-                    for item in value
-                ]
-            else:
-                sanitized[key] = value
+        # Walk with an explicit stack, filling each output container in place
+        sanitized: Dict[str, Any] = {}
+        stack = [(data, sanitized)]
+        while stack:
+            source, target = stack.pop()
+            for key, value in source.items():
+                if isinstance(value, str):
+                    target[key] = cls.sanitize_text(value, mask_char)
+                elif isinstance(value, dict):
+                    child: Dict[str, Any] = {}
+                    target[key] = child
+                    stack.append((value, child))
+                elif isinstance(value, list):
+                    items = []
+                    for item in value:
+                        if isinstance(item, dict):
+                            child = {}
+                            stack.append((item, child))
+                            items.append(child)
+                        elif isinstance(item, str):
+                            items.append(cls.sanitize_text(item, mask_char))
+                        else:
+                            items.append(item)
+                    target[key] = items
+                else:
+                    target[key] = value
         
         return sanitized
     
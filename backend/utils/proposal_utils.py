@@ -2,6 +2,27 @@
 Utility functions for proposal processing.
 """
 from typing import Dict, Any, Optional
+import re
+
+# Company name placeholder patterns to replace (matched case-insensitively)
+_PLACEHOLDERS = (
+    "[company name]",
+    "[your company name]",
+    "[COMPANY_NAME]",
+    "[COMPANY NAME]",
+    "[Company Name]",
+    "{company_name}",
+    "{company name}",
+    "{COMPANY_NAME}",
+    "{{company_name}}",
+    "{{company name}}",
+)
+
+# One pass over the text; longest first so "{{company_name}}" wins over "{company_name}"
+_PLACEHOLDER_RE = re.compile(
+    "|".join(re.escape(p) for p in sorted(_PLACEHOLDERS, key=len, reverse=True)),
+    re.IGNORECASE
+)
 
 
 def replace_company_placeholders(text: str, company_name: Optional[str] = None) -> str:
@@ -21,28 +42,12 @@ def replace_company_placeholders(text: str, company_name: Optional[str] = None)
     if not company_name or not company_name.strip():
         return text
     
-    # List of placeholder patterns to replace (case-insensitive)
-    placeholders = [
-        "[company name]",
-        "[your company name]",
-        "[COMPANY_NAME]",
-        "[COMPANY NAME]",
-        "[Company Name]",
-        "{company_name}",
-        "{company name}",
-        "{COMPANY_NAME}",
-        "{{company_name}}",
-        "{{company name}}",
-    ]
-    
-    result = text
-    for placeholder in placeholders:
-        # Case-insensitive replacement
-        import re
-        pattern = re.escape(placeholder)
-        result = re.sub(pattern, company_name, result, flags=re.IGNORECASE)
+    # Every placeholder starts with a bracket or brace; skip the regex when neither occurs
+    if "[" not in text and "{" not in text:
+        return text
     
-    return result
+    # Callable replacement so backslashes in the company name are inserted literally
+    return _PLACEHOLDER_RE.sub(lambda _match: company_name, text)
 
 
 def replace_placeholders_in_proposal_draft(
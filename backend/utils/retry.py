@@ -3,8 +3,10 @@ Retry mechanisms for resilient API calls.
 """
 from typing import Callable, Any, Optional, Type, Tuple
 from functools import wraps
+import asyncio
 import time
 import logging
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
@@ -14,13 +16,27 @@ class PermanentError(Exception):
     pass
 
 
+def _delay_table(max_attempts: int, backoff: str, base_delay: float, max_delay: float) -> Tuple[float, ...]:
+    """Sleep before each retry, indexed by attempt - 1; computed once per decorator."""
+    delays = []
+    for attempt in range(1, max_attempts):
+        if backoff == "exponential":
+            delays.append(min(base_delay * (2 ** (attempt - 1)), max_delay))
+        elif backoff == "linear":
+            delays.append(min(base_delay * attempt, max_delay))
+        else:  # fixed
+            delays.append(base_delay)
+    return tuple(delays)
+
+
 def retry(
     max_attempts: int = 3,
     backoff: str = "exponential",
     base_delay: float = 1.0,
     max_delay: float = 60.0,
     exceptions: Tuple[Type[Exception], ...] = (Exception,),
-    on_retry: Optional[Callable] = None
+    on_retry: Optional[Callable] = None,
+    breaker: Optional[CircuitBreaker] = None
 ):
     """
     Retry decorator with exponential backoff.
@@ -32,15 +48,20 @@ def retry(
         max_delay: Maximum delay in seconds
         exceptions: Tuple of exceptions to catch
         on_retry: Optional callback function called on each retry
+        breaker: Optional CircuitBreaker that counts each call that exhausts
+            its retries as one failure and fails fast while it is open
     """
+    delays = _delay_table(max_attempts, backoff, base_delay, max_delay)
+    
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs) -> Any:
+        def attempts(*args, **kwargs) -> Any:
             last_exception = None
-            
             for attempt in range(1, max_attempts + 1):
                 try:
                     return func(*args, **kwargs)
+                except CircuitOpenError:
+                    # An inner breaker is already failing fast; retrying would only wait
+                    raise
                 except PermanentError as e:
                     # Don't retry permanent errors (e.g., leaked API keys)
                     logger.error(
@@ -56,13 +77,7 @@ def retry(
                         )
                         raise
                     
-                    # Calculate delay
-                    if backoff == "exponential":
-                        delay = min(base_delay * (2 ** (attempt - 1)), max_delay)
-                    elif backoff == "linear":
-                        delay = min(base_delay * attempt, max_delay)
-                    else:  # fixed
-                        delay = base_delay
+                    delay = delays[attempt - 1]
                     
                     logger.warning(
                         f"Function {func.__name__} failed (attempt {attempt}/{max_attempts}): {e}. "
@@ -78,6 +93,13 @@ def retry(
             if last_exception:
                 raise last_exception
         
+        if breaker is None:
+            return wraps(func)(attempts)
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            return breaker.call(attempts, *args, **kwargs)
+        
         return wrapper
     return decorator
 
@@ -88,7 +110,8 @@ def async_retry(
     base_delay: float = 1.0,
     max_delay: float = 60.0,
     exceptions: Tuple[Type[Exception], ...] = (Exception,),
-    on_retry: Optional[Callable] = None
+    on_retry: Optional[Callable] = None,
+    breaker: Optional[CircuitBreaker] = None
 ):
     """
     Async retry decorator with exponential backoff.
@@ -100,17 +123,20 @@ def async_retry(
         max_delay: Maximum delay in seconds
         exceptions: Tuple of exceptions to catch
         on_retry: Optional async callback function called on each retry
+        breaker: Optional CircuitBreaker that counts each call that exhausts
+            its retries as one failure and fails fast while it is open
     """
-    import asyncio
+    delays = _delay_table(max_attempts, backoff, base_delay, max_delay)
     
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def wrapper(*args, **kwargs) -> Any:
+        async def attempts(*args, **kwargs) -> Any:
             last_exception = None
-            
             for attempt in range(1, max_attempts + 1):
                 try:
                     return await func(*args, **kwargs)
+                except CircuitOpenError:
+                    # An inner breaker is already failing fast; retrying would only wait
+                    raise
                 except PermanentError as e:
                     # Don't retry permanent errors (e.g., leaked API keys)
                     logger.error(
@@ -126,13 +152,7 @@ def async_retry(
                         )
                         raise
                     
-                    # Calculate delay
-                    if backoff == "exponential":
-                        delay = min(base_delay * (2 ** (attempt - 1)), max_delay)
-                    elif backoff == "linear":
-                        delay = min(base_delay * attempt, max_delay)
-                    else:  # fixed
-                        delay = base_delay
+                    delay = delays[attempt - 1]
                     
                     logger.warning(
                         f"Async function {func.__name__} failed (attempt {attempt}/{max_attempts}): {e}. "
@@ -151,6 +171,13 @@ def async_retry(
             if last_exception:
                 raise last_exception
         
+        if breaker is None:
+            return wraps(func)(attempts)
+        
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            return await breaker.call_async(attempts, *args, **kwargs)
+        
         return wrapper
     return decorator
 
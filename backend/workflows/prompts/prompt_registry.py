@@ -2,7 +2,7 @@
 Prompt registry for versioning and tracking prompts with LangSmith.
 """
 from typing import Dict, Any, Optional
-from utils.langsmith_monitor import langsmith_monitor
+from utils.langsmith_monitor import get_langsmith_monitor
 from workflows.prompts.prompt_templates import (
     get_few_shot_rfp_analyzer_prompt,
     get_few_shot_challenge_extractor_prompt,
@@ -54,6 +54,7 @@ class PromptRegistry:
         prompt_template = getter()
         
         # Track prompt with LangSmith
+        langsmith_monitor = get_langsmith_monitor()
         if langsmith_monitor.is_enabled():
             langsmith_monitor.track_prompt(
                 prompt_name=prompt_name,
@@ -77,6 +78,7 @@ class PromptRegistry:
         cls.PROMPT_VERSIONS[prompt_name] = version
         
         # Track with LangSmith
+        langsmith_monitor = get_langsmith_monitor()
         if langsmith_monitor.is_enabled():
             langsmith_monitor.track_prompt(
                 prompt_name=prompt_name,
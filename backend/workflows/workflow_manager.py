@@ -1,6 +1,7 @@
 """
 Workflow manager for executing and managing multi-agent workflows.
 """
+import asyncio
 from typing import Dict, Any, Optional, List
 from workflows.graph import workflow_graph
 from workflows.state import create_initial_state, WorkflowState
@@ -25,7 +26,8 @@ class WorkflowManager:
         rfp_document_id: int,
         db: Session,
         selected_tasks: Optional[Dict[str, bool]] = None,
-        user_id: Optional[int] = None
+        user_id: Optional[int] = None,
+        event_loop: Optional[asyncio.AbstractEventLoop] = None
     ) -> Dict[str, Any]:
         """
         Run the complete workflow.
@@ -34,6 +36,7 @@ class WorkflowManager:
             project_id: Project ID
             rfp_document_id: RFP document ID
             db: Database session
+            event_loop: Loop to push WebSocket updates on when running in a worker thread
         
         Returns:
             dict with workflow results
@@ -117,38 +120,30 @@ class WorkflowManager:
             # Stream skeleton if generated (non-blocking)
             if final_state.get("proposal_outline") and user_id:
                 try:
-                    import asyncio
+                    skeleton_message = global_ws_manager.send_to_user(
+                        user_id,
+                        {
+                            "type": "skeleton",
+                            "project_id": project_id,
+                            "outline": final_state.get("proposal_outline"),
+                            "timestamp": str(__import__("datetime").datetime.now())
+                        }
+                    )
                     # Try to send skeleton via WebSocket
                     try:
-                        loop = asyncio.get_event_loop()
-                        if loop.is_running():
-                            # If loop is running, schedule it
-                            asyncio.create_task(
-                                global_ws_manager.send_to_user(
-                                    user_id,
-                                    {
-                                        "type": "skeleton",
-                                        "project_id": project_id,
-                                        "outline": final_state.get("proposal_outline"),
-                                        "timestamp": str(__import__("datetime").datetime.now())
-                                    }
-                                )
-                            )
+                        if event_loop is not None:
+                            # Running in a worker thread: hand off to the caller's loop
+                            asyncio.run_coroutine_threadsafe(skeleton_message, event_loop)
                         else:
-                            loop.run_until_complete(
-                                global_ws_manager.send_to_user(
-                                    user_id,
-                                    {
-                                        "type": "skeleton",
-                                        "project_id": project_id,
-                                        "outline": final_state.get("proposal_outline"),
-                                        "timestamp": str(__import__("datetime").datetime.now())
-                                    }
-                                )
-                            )
+                            loop = asyncio.get_event_loop()
+                            if loop.is_running():
+                                # If loop is running, schedule it
+                                asyncio.create_task(skeleton_message)
+                            else:
+                                loop.run_until_complete(skeleton_message)
                     except:
                         # If async fails, skip (non-critical)
-                        pass
+                        skeleton_message.close()
                 except:
                     pass
             